@@ -0,0 +1,50 @@
+# encoding: utf-8
+
+"""Per-call cost of marrow.util.object.getargspec.
+
+Compares inspection with the per-callable cache cleared before every call
+against cached lookups for the kinds of callable a dispatcher encounters.
+
+    python benchmarks/argspec.py [iterations]
+
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+
+SETUP = """
+import functools
+from marrow.util.object import getargspec, _argspecs
+
+def function(a, b=2, *args, **kw): pass
+
+class Controller(object):
+    def __init__(self, context): pass
+    def index(self, page=1, limit=20): pass
+    def __call__(self, *args, **kw): pass
+
+controller = Controller(None)
+bound = functools.partial(function, 1)
+"""
+
+CASES = [
+        ("function", "getargspec(function)"),
+        ("bound method", "getargspec(controller.index)"),
+        ("class", "getargspec(Controller)"),
+        ("partial", "getargspec(bound)"),
+        ("instance", "getargspec(controller)"),
+    ]
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    for name, statement in CASES:
+        cold = min(timeit.repeat("_argspecs[0].clear(); _argspecs[1].clear(); " + statement, SETUP, number=number, repeat=3)) / number
+        warm = min(timeit.repeat(statement, SETUP, number=number, repeat=3)) / number
+
+        print("{0:<14} uncached {1:>8.2f} us/call   cached {2:>6.2f} us/call   {3:>5.1f}x".format(
+                name, cold * 1e6, warm * 1e6, cold / warm))
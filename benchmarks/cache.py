@@ -0,0 +1,156 @@
+# encoding: utf-8
+
+"""Micro-benchmarks for marrow.util.object.Cache.
+
+Compares the current implementation against the original dictionary-backed
+linked list (reproduced below as LegacyCache) for get, set, and evict
+throughput and per-entry memory at a range of sizes.
+
+    python benchmarks/cache.py [size ...]
+
+"""
+
+from __future__ import print_function
+
+import gc
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError: # pragma: no cover
+    tracemalloc = None
+
+from marrow.util.compat import range
+from marrow.util.object import Cache
+
+
+class LegacyCache(dict):
+    """The original Cache implementation, retained for comparison."""
+
+    class CacheElement(object):
+        def __init__(self, key, value):
+            self.previous = self.next = None
+            self.key, self.value = key, value
+
+    def __init__(self, capacity):
+        super(LegacyCache, self).__init__()
+
+        self.head = self.tail = None
+        self.capacity = capacity
+
+    def __getitem__(self, key):
+        element = super(LegacyCache, self).__getitem__(key)
+        self._update(element)
+        return element.value
+
+    def __setitem__(self, key, value):
+        try:
+            element = super(LegacyCache, self).__getitem__(key)
+            element.value = value
+            self._update(element)
+
+        except KeyError:
+            element = self.CacheElement(key, value)
+            super(LegacyCache, self).__setitem__(key, element)
+            self._insert(element)
+
+        self._restrict()
+
+    def _insert(self, element):
+        element.previous, element.next = None, self.head
+
+        if self.head is not None:
+            self.head.previous = element
+
+        else:
+            self.tail = element
+
+        self.head = element
+
+    def _restrict(self):
+        while len(self) > self.capacity:
+            del self[self.tail.key]
+
+            if self.tail != self.head:
+                self.tail = self.tail.previous
+                self.tail.next = None
+
+            else:
+                self.head = self.tail = None
+
+    def _update(self, element):
+        if self.head == element:
+            return
+
+        previous = element.previous
+        previous.next = element.next
+
+        if element.next is not None:
+            element.next.previous = previous
+
+        else:
+            self.tail = previous
+
+        element.previous, element.next = None, self.head
+        self.head.previous = self.head = element
+
+
+def timed(fn, *args):
+    gc.collect()
+    start = time.perf_counter() if hasattr(time, 'perf_counter') else time.time()
+    fn(*args)
+    end = time.perf_counter() if hasattr(time, 'perf_counter') else time.time()
+    return end - start
+
+
+def fill(cache, size):
+    for i in range(size):
+        cache[i] = i
+
+
+def hits(cache, size):
+    for i in range(size):
+        cache[i]
+
+
+def evict(cache, size):
+    for i in range(size, size * 2):
+        cache[i] = i
+
+
+def memory(cls, size):
+    if tracemalloc is None:
+        return float('nan')
+
+    gc.collect()
+    tracemalloc.start()
+    cache = cls(size)
+    fill(cache, size)
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del cache
+
+    return used / float(size)
+
+
+def run(size):
+    print("{0:,} entries".format(size))
+
+    for cls in (LegacyCache, Cache):
+        cache = cls(size)
+
+        results = (
+                size / timed(fill, cache, size),
+                size / timed(hits, cache, size),
+                size / timed(evict, cache, size),
+                memory(cls, size)
+            )
+
+        print("    {0:<12} set {1:>12,.0f}/s  get {2:>12,.0f}/s  evict {3:>12,.0f}/s  {4:>6.1f} B/entry".format(
+                cls.__name__, *results))
+
+
+if __name__ == '__main__':
+    for size in [int(i) for i in sys.argv[1:]] or [10000, 100000, 1000000]:
+        run(size)
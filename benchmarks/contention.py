@@ -0,0 +1,78 @@
+# encoding: utf-8
+
+"""Contention benchmark for marrow.util.object.ConcurrentCache.
+
+Runs a read-mostly workload (90% reads by default) from a growing number of
+threads against a single Cache guarded by one global lock and against a
+lock-striped ConcurrentCache, reporting aggregate operations per second.
+
+    python benchmarks/contention.py [threads ...]
+
+"""
+
+from __future__ import print_function
+
+import random
+import sys
+import threading
+import time
+
+from marrow.util.object import Cache, ConcurrentCache
+
+
+CAPACITY = 10000
+KEYS = 20000
+OPERATIONS = 100000
+READS = 0.9
+
+
+class LockedCache(object):
+    """A Cache serialized behind a single global lock."""
+
+    def __init__(self, capacity):
+        self._lock = threading.Lock()
+        self._cache = Cache(capacity)
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._cache.get(key, default)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+
+
+def worker(cache, keys, reads):
+    for key, read in zip(keys, reads):
+        if read:
+            cache.get(key)
+        else:
+            cache[key] = key
+
+
+def run(cache, count):
+    workload = []
+
+    for i in range(count):
+        rng = random.Random(i)
+        workload.append((
+                [rng.randrange(KEYS) for j in range(OPERATIONS)],
+                [rng.random() < READS for j in range(OPERATIONS)]
+            ))
+
+    threads = [threading.Thread(target=worker, args=(cache, ) + work) for work in workload]
+
+    start = time.time()
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+
+    return (OPERATIONS * count) / (time.time() - start)
+
+
+if __name__ == '__main__':
+    for count in [int(i) for i in sys.argv[1:]] or [1, 2, 4, 8, 16]:
+        print("{0:>2} thread{1}: global lock {2:>12,.0f} ops/s  striped {3:>12,.0f} ops/s".format(
+                count, ' ' if count == 1 else 's',
+                run(LockedCache(CAPACITY), count),
+                run(ConcurrentCache(CAPACITY), count)
+            ))
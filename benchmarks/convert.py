@@ -0,0 +1,102 @@
+# encoding: utf-8
+
+"""Throughput of the bulk converters in marrow.util.convert.
+
+Converts a column of typical CSV/configuration field values using the
+original scalar boolean() (reproduced below as legacy_boolean), the current
+scalar function, and the bulk boolean_many(), plus a NumPy array of strings
+when NumPy is installed.  Integer and float columns, as lists of strings and
+as whitespace-separated byte buffers, are converted using the scalar
+integer() and number() and the bulk integers() and numbers().
+
+    python benchmarks/convert.py [rows]
+
+"""
+
+from __future__ import print_function
+
+import random
+import sys
+import time
+
+from marrow.util.convert import boolean, boolean_many, integer, integers, number, numbers
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def legacy_boolean(input):
+    try:
+        input = input.strip().lower()
+    except AttributeError:
+        return bool(input)
+    
+    if input in ('yes', 'y', 'on', 'true', 't', '1'):
+        return True
+    
+    if input in ('no', 'n', 'off', 'false', 'f', '0'):
+        return False
+    
+    raise ValueError("Unable to convert {0!r} to a boolean value.".format(input))
+
+
+def scalar(convert, values):
+    results, invalid = [], []
+    
+    for i, value in enumerate(values):
+        try:
+            results.append(convert(value))
+        except ValueError:
+            results.append(0)
+            invalid.append(i)
+    
+    return results, invalid
+
+
+def measure(label, fn, rows):
+    best = min(timing(fn) for i in range(3))
+    print("{0:<24} {1:>8.3f}s   {2:>7.1f} ns/value".format(label, best, best / rows * 1e9))
+
+
+def timing(fn):
+    start = time.time()
+    fn()
+    return time.time() - start
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    
+    random.seed(0)
+    words = ['true', 'false', 'True', 'False', 'yes', 'no', '1', '0', 'on', 'off', ' Yes ', 'FALSE']
+    values = [random.choice(words) for i in range(rows)]
+    encoded = [value.encode('ascii') for value in values]
+    
+    print("Converting {0} boolean fields.".format(rows))
+    
+    measure("legacy boolean()", lambda: [legacy_boolean(value) for value in values], rows)
+    measure("boolean()", lambda: [boolean(value) for value in values], rows)
+    measure("boolean_many()", lambda: boolean_many(values), rows)
+    measure("boolean_many(), bytes", lambda: boolean_many(encoded), rows)
+    
+    if numpy is not None:
+        column = numpy.array(values)
+        measure("boolean_many(), NumPy", lambda: boolean_many(column), rows)
+    
+    ints = [str(random.randint(-10 ** 6, 10 ** 6)) for i in range(rows)]
+    floats = ["{0:.3f}".format(random.uniform(-1000, 1000)) for i in range(rows)]
+    dirty = [value if i % 100 else 'n/a' for i, value in enumerate(ints)]
+    buffers = [' '.join(ints).encode('ascii'), ' '.join(floats).encode('ascii')]
+    
+    print("\nConverting {0} numeric fields.".format(rows))
+    
+    measure("integer() loop", lambda: scalar(integer, ints), rows)
+    measure("integers()", lambda: integers(ints), rows)
+    measure("integer() loop, 1% bad", lambda: scalar(integer, dirty), rows)
+    measure("integers(), 1% bad", lambda: integers(dirty), rows)
+    measure("integers(), buffer", lambda: integers(buffers[0]), rows)
+    measure("number() loop, floats", lambda: scalar(number, floats), rows)
+    measure("numbers(), floats", lambda: numbers(floats), rows)
+    measure("numbers(), buffer", lambda: numbers(buffers[1]), rows)
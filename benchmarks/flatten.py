@@ -0,0 +1,67 @@
+# encoding: utf-8
+
+"""Benchmarks for marrow.util.object.flatten and flat.
+
+Compares the original recursive generator (reproduced below) against the
+iterative flatten() generator and the list-building flat() on wide, shallow
+input and narrow, deep input.
+
+    python benchmarks/flatten.py
+
+"""
+
+from __future__ import print_function
+
+import timeit
+
+from marrow.util.compat import binary, unicode
+from marrow.util.object import flatten, flat
+
+
+def recursive(x):
+    for el in x:
+        if hasattr(el, "__iter__") and not isinstance(el, (binary, unicode)):
+            for els in recursive(el):
+                yield els
+        else:
+            yield el
+
+
+def deep(depth):
+    nested = [0]
+
+    for i in range(1, depth):
+        nested = [i, nested]
+
+    return nested
+
+
+CASES = [
+        ("wide (1000 x 100)", [list(range(100)) for i in range(1000)]),
+        ("mixed (10000 x [int, (int, str)])", [[i, (i, 'x')] for i in range(10000)]),
+        ("deep (500 levels)", deep(500)),
+        ("deep (5000 levels)", deep(5000)),
+    ]
+
+IMPLEMENTATIONS = [
+        ("recursive", lambda x: list(recursive(x))),
+        ("flatten", lambda x: list(flatten(x))),
+        ("flat", flat),
+    ]
+
+
+def measure(fn, data, number=5):
+    try:
+        return min(timeit.repeat(lambda: fn(data), number=number, repeat=3)) / number
+
+    except RuntimeError:  # RecursionError is a subclass.
+        return None
+
+
+if __name__ == '__main__':
+    for name, data in CASES:
+        print(name)
+
+        for label, fn in IMPLEMENTATIONS:
+            duration = measure(fn, data)
+            print("    {0:<10} {1}".format(label, "recursion limit exceeded" if duration is None else "{0:10.2f} ms".format(duration * 1e3)))
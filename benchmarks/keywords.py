@@ -0,0 +1,88 @@
+# encoding: utf-8
+
+"""Split throughput of marrow.util.convert.KeywordProcessor engines.
+
+Compares the regular expression and scanner engines, configured as the
+module-level tags and terms processors, on short search queries and long tag
+lists, with and without quoted values, and the cost of a result cache hit.
+Then joins the tag sets of many rows using the original per-row join()
+(reproduced below as legacy_join), join_many(), and join_many() across a
+pool of processes.
+
+    python benchmarks/keywords.py [iterations] [rows]
+
+"""
+
+from __future__ import print_function
+
+import random
+import sys
+import time
+import timeit
+
+from marrow.util.convert import KeywordProcessor
+
+
+TAGS = dict(separators=' \t,', normalize=lambda s: s.lower().strip('"'), sort=True, result=set)
+TERMS = dict(groups=[None, '+', '-'], group=tuple)
+
+def legacy_join(processor, values):
+    def sanatize(keyword):
+        if not processor.quotes:
+            return keyword
+
+        for sep in processor.separators:
+            if sep in keyword:
+                return processor.quotes[0] + keyword + processor.quotes[0]
+
+        return keyword
+
+    return processor.separators[0].join([sanatize(keyword) for keyword in values])
+
+
+def joins(rows):
+    processor = KeywordProcessor(' \t,')
+    words = ['panda', 'bends', 'high altitude', 'melting panda', 'cat', 'dog', 'medical treatment'] + ['tag{0}'.format(i) for i in range(50)]
+
+    random.seed(0)
+    records = [random.sample(words, 8) for i in range(rows)]
+
+    print("\nJoining {0} rows of 8 tags.".format(rows))
+
+    for label, fn in (
+            ("legacy join() per row", lambda: [legacy_join(processor, record) for record in records]),
+            ("join_many()", lambda: list(processor.join_many(records))),
+            ("join_many(), 4 processes", lambda: list(processor.join_many(records, 4, 5000))),
+        ):
+        start = time.time()
+        fn()
+        print("{0:<26} {1:>8.3f}s".format(label, time.time() - start))
+
+
+CASES = [
+        ("terms, short query", TERMS, 'animals +cat -dog'),
+        ("terms, quoted query", TERMS, 'animals +cat -dog +"medical treatment"'),
+        ("tags, 200 tags", TAGS, ', '.join('Tag{0}'.format(i) for i in range(200))),
+        ("tags, 200 with quotes", TAGS, ', '.join('"Tag {0}"'.format(i) if i % 10 == 0 else 'Tag{0}'.format(i) for i in range(200))),
+    ]
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    for name, options, value in CASES:
+        processors = [KeywordProcessor(engine=engine, **options) for engine in ('regex', 'scanner')]
+        processors.append(KeywordProcessor(cache=128, **options))
+        assert processors[0].split(value) == processors[1].split(value)
+
+        calls = max(number * 20 // len(value), 100)
+        timings = [float('inf')] * len(processors)
+
+        for i in range(7):  # Interleave the engines so that both see the same background load.
+            for j, processor in enumerate(processors):
+                timings[j] = min(timings[j], timeit.timeit(lambda: processor.split(value), number=calls) / calls)
+
+        print("{0:<24} regex {1:>8.2f} us   scanner {2:>8.2f} us   {3:>4.1f}x   cached {4:>6.2f} us".format(
+                name, timings[0] * 1e6, timings[1] * 1e6, timings[0] / timings[1], timings[2] * 1e6))
+
+    joins(int(sys.argv[2]) if len(sys.argv) > 2 else 200000)
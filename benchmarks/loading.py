@@ -0,0 +1,34 @@
+# encoding: utf-8
+
+"""Per-call cost of marrow.util.object.load_object.
+
+Measures dotted-notation and plugin (entry point) lookups with the resolution
+cache cold (invalidated before every call) and warm.
+
+    python benchmarks/loading.py [iterations]
+
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+
+SETUP = "from marrow.util.object import load_object, load_objects, invalidate_object"
+
+CASES = [
+        ("dotted", "load_object('marrow.util.bunch:Bunch')"),
+        ("entry point", "load_object('sdist', 'distutils.commands')"),
+        ("bulk (4 targets)", "load_objects(['marrow.util.bunch:Bunch', 'marrow.util.bunch:MultiBunch', 'marrow.util.object:Cache', 'marrow.util.object:merge'])"),
+    ]
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    for name, statement in CASES:
+        cold = min(timeit.repeat("invalidate_object(); " + statement, SETUP, number=max(number // 10, 1), repeat=3)) / max(number // 10, 1)
+        warm = min(timeit.repeat(statement, SETUP, number=number, repeat=3)) / number
+
+        print("{0:<18} cold {1:>10.2f} us/call   cached {2:>8.3f} us/call".format(name, cold * 1e6, warm * 1e6))
@@ -0,0 +1,87 @@
+# encoding: utf-8
+
+"""Write throughput of marrow.util.object.LoggingFile.
+
+Simulates a chatty library printing to a redirected stream (each line is a
+write of the text followed by a write of the newline) from several threads,
+logging to a formatted FileHandler.  Reports the time the writers spend
+blocked in write() and the total time until every record has been handled.
+
+    python benchmarks/logfile.py [lines per thread] [threads]
+
+"""
+
+from __future__ import print_function
+
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from marrow.util.object import LoggingFile
+
+
+class Counter(logging.Filter):
+    count = 0
+
+    def filter(self, record):
+        self.count += 1
+        return True
+
+
+def run(buffered, lines, threads):
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    counter = Counter()
+    handler.addFilter(counter)
+
+    log = logging.getLogger('benchmark.' + ('buffered' if buffered else 'direct'))
+    log.addHandler(handler)
+    log.propagate = False
+
+    f = LoggingFile(log, buffered=buffered)
+    blocked = []
+
+    def writer():
+        start = time.time()
+
+        for i in range(lines):
+            f.write("Processed item {0} of the batch.".format(i))
+            f.write("\n")
+
+        blocked.append(time.time() - start)
+
+    workers = [threading.Thread(target=writer) for i in range(threads)]
+    start = time.time()
+
+    for worker in workers:
+        worker.start()
+
+    for worker in workers:
+        worker.join()
+
+    f.close()
+    total = time.time() - start
+
+    log.removeHandler(handler)
+    handler.close()
+
+    os.unlink(path)
+
+    return max(blocked), total, counter.count
+
+
+if __name__ == '__main__':
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    for label, buffered in (("per-write", False), ("buffered", True)):
+        blocked, total, records = run(buffered, lines, threads)
+
+        print("{0:<10} writers blocked {1:>7.3f}s  ({2:>6.2f} us/write)   total {3:>7.3f}s   {4} records".format(
+                label, blocked, blocked / (lines * 2) * 1e6, total, records))
@@ -0,0 +1,74 @@
+# encoding: utf-8
+
+"""Throughput of marrow.util.convert.RecordConverter.
+
+Converts a synthetic dataset of records, as dictionaries and as tuples, with
+roughly one record in a hundred holding an invalid field.  The baseline is the
+obvious loop over the schema, calling each converter within its own
+exception handler to collect errors.  The full schema's time is dominated by
+the converters themselves; the narrow schema, of integer, boolean, and
+passed-through fields only, shows the per-field overhead removed.
+
+    python benchmarks/records.py [rows]
+
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+from marrow.util.convert import RecordConverter, boolean, integer, number, tags
+
+
+SCHEMA = [('id', integer), ('active', boolean), ('score', number), ('tags', tags), ('name', None)]
+NARROW = [('id', integer), ('active', boolean), ('name', None)]
+
+
+def generate(count):
+    for i in range(count):
+        yield {
+                'id': str(i) if i % 97 else 'n/a',
+                'active': ('yes', 'no', 'True', 'off')[i % 4],
+                'score': '{0}.5'.format(i % 1000),
+                'tags': ('red', 'red blue', '')[i % 3],
+                'name': 'record-{0}'.format(i),
+            }
+
+
+def naive(schema, rows):
+    for row in rows:
+        result, errors = {}, {}
+        
+        for field, convert in schema:
+            try:
+                value = row[field]
+                result[field] = value if convert is None else convert(value)
+            except (TypeError, ValueError, KeyError) as e:
+                errors[field] = e
+                result[field] = None
+        
+        yield result, errors or None
+
+
+def measure(label, fn, rows):
+    start = time.time()
+    failed = sum(1 for result, errors in fn(rows) if errors)
+    duration = time.time() - start
+    
+    print("{0:<28} {1:>8.3f}s {2:>10.0f} rows/s {3:>6} failed".format(label, duration, len(rows) / duration, failed))
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    mapped = list(generate(count))
+    
+    for label, schema in (("full", SCHEMA), ("narrow", NARROW)):
+        fields = [field for field, convert in schema]
+        ordered = [tuple(row[field] for field in fields) for row in mapped]
+        converter = RecordConverter(schema)
+        
+        print("{0} schema, {1} rows".format(label, count))
+        measure("per-field loop", lambda rows: naive(schema, rows), mapped)
+        measure("RecordConverter (dict)", converter.many, mapped)
+        measure("RecordConverter (tuple)", converter.many, ordered)
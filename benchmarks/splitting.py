@@ -0,0 +1,68 @@
+# encoding: utf-8
+
+"""Peak memory and time of marrow.util.convert.array and iter_array.
+
+Splits a large comma-separated value held in memory, and the same value read
+from a file, counting the values found.  Peak memory is the high-water mark
+of Python allocations (via tracemalloc) while splitting, excluding the input;
+times include the tracing overhead.
+
+    python benchmarks/splitting.py [megabytes]
+
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from marrow.util.convert import array, iter_array
+
+
+def measure(label, fn):
+    tracemalloc.start()
+    start = time.time()
+    count = fn()
+    duration = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    
+    print("{0:<28} {1:>8} values {2:>8.3f}s   peak {3:>9.2f} MiB".format(label, count, duration, peak / 1048576.0))
+
+
+def read(path):
+    with open(path) as fh:
+        return len(array(fh.read()))
+
+
+def stream(path):
+    with open(path) as fh:
+        return sum(1 for value in iter_array(fh))
+
+
+if __name__ == '__main__':
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 16
+    
+    item = "value-{0}, "
+    text = ''.join(item.format(i) for i in range(int(megabytes * 1048576 / len(item.format(100000)))))
+    view = memoryview(text.encode('ascii'))
+    
+    fd, path = tempfile.mkstemp()
+    
+    with os.fdopen(fd, 'w') as fh:
+        fh.write(text)
+    
+    print("Splitting {0:.1f} MiB.".format(len(text) / 1048576.0))
+    
+    try:
+        measure("array(str)", lambda: len(array(text)))
+        measure("iter_array(str)", lambda: sum(1 for value in iter_array(text)))
+        measure("iter_array(memoryview)", lambda: sum(1 for value in iter_array(view)))
+        measure("array(file.read())", lambda: read(path))
+        measure("iter_array(file)", lambda: stream(path))
+    
+    finally:
+        os.unlink(path)
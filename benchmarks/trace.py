@@ -0,0 +1,87 @@
+# encoding: utf-8
+
+"""Trace-replay benchmark for the cache eviction policies in marrow.util.object.
+
+Replays a recorded key trace (one key per line) through each policy and
+reports the hit ratio and throughput.  Each reference is treated as a lookup
+followed, on a miss, by storing the key.  Without a trace file a synthetic
+workload is generated: a Zipf-distributed interactive working set interrupted
+by periodic sequential scans over keys that are never seen again.
+
+    python benchmarks/trace.py [--capacity N] [trace-file]
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import random
+import time
+
+from marrow.util.object import Cache, SegmentedCache
+
+
+POLICIES = [
+        ('LRU', Cache),
+        ('SLRU', SegmentedCache),
+        ('SLRU+TinyLFU', lambda capacity: SegmentedCache(capacity, admission=True)),
+    ]
+
+
+def synthetic(length=500000, keys=50000, skew=1.1, scan=20000, every=100000, seed=0):
+    rng = random.Random(seed)
+    weights = [1.0 / (rank ** skew) for rank in range(1, keys + 1)]
+    total = sum(weights)
+
+    # Inverse transform sampling over the cumulative distribution.
+    cumulative, running = [], 0.0
+    for weight in weights:
+        running += weight / total
+        cumulative.append(running)
+
+    from bisect import bisect_left
+
+    trace, scanned = [], 0
+
+    for i in range(length):
+        if i and not i % every:
+            trace.extend('scan-%d' % (scanned + j) for j in range(scan))
+            scanned += scan
+
+        trace.append(min(bisect_left(cumulative, rng.random()), keys - 1))
+
+    return trace
+
+
+def load(path):
+    with open(path) as trace:
+        return [line.rstrip('\n') for line in trace if line.strip()]
+
+
+def replay(cache, trace):
+    hits = 0
+    start = time.time()
+
+    for key in trace:
+        try:
+            cache[key]
+            hits += 1
+
+        except KeyError:
+            cache[key] = key
+
+    return hits / float(len(trace)), len(trace) / (time.time() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a key trace through each cache policy.")
+    parser.add_argument('trace', nargs='?', help="a file containing one key per line")
+    parser.add_argument('--capacity', type=int, default=5000)
+    options = parser.parse_args()
+
+    trace = load(options.trace) if options.trace else synthetic()
+    print("{0:,} references, capacity {1:,}".format(len(trace), options.capacity))
+
+    for name, factory in POLICIES:
+        ratio, rate = replay(factory(options.capacity), trace)
+        print("    {0:<14} hit ratio {1:6.2%}  {2:>12,.0f} ops/s".format(name, ratio, rate))
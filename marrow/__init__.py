@@ -1,4 +1 @@
-try: # pragma: no cover
-    __import__('pkg_resources').declare_namespace(__name__)
-except ImportError: # pragma: no cover
-    __import__('pkgutil').extend_path(__path__, __name__)
\ No newline at end of file
+__path__ = __import__('pkgutil').extend_path(__path__, __name__)
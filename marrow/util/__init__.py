@@ -1,4 +1,49 @@
-try: # pragma: no cover
-    __import__('pkg_resources').declare_namespace(__name__)
-except ImportError: # pragma: no cover
-    __import__('pkgutil').extend_path(__path__, __name__)
\ No newline at end of file
+# encoding: utf-8
+
+"""A collection of many commonly reimplemented utility classes and functions.
+
+The public names of the submodules are available directly from this package,
+e.g. ``from marrow.util import Cache, Bunch``.  Each submodule is only
+imported the first time one of its names is accessed, so importing this
+package is cheap.
+"""
+
+_exports = {
+        'bunch': ('Bunch', 'MultiBunch'),
+        'convert': ('boolean', 'boolean_many', 'array', 'iter_array', 'integer', 'integers', 'number', 'numbers',
+                'KeywordProcessor', 'tags', 'terms', 'RecordConverter', 'ConversionError'),
+        'futures': ('ScalingPoolExecutor', ),
+        'insensitive': ('CaseInsensitiveDict', ),
+        'object': ('NoDefault', 'flatten', 'flat', 'yield_property', 'yield_keyvalue', 'extract_columns',
+                'merge', 'merge_layers', 'load_object', 'load_objects', 'invalidate_object',
+                'PluginCache', 'Cache', 'ConcurrentCache', 'SegmentedCache', 'FrequencySketch', 'CacheReaper',
+                'CachedFunction', 'cached', 'LoggingFile', 'CounterMeta', 'getargspec', 'compile_binder', 'RichComparisonMixin'),
+        'path': ('Path', ),
+        'patterns': ('Borg', ),
+        'persist': ('DiskStore', 'TieredCache'),
+        'shared': ('SharedCache', ),
+        'text': ('normalize', 'ellipsis', 'wrap'),
+        'tuple': ('NamedTuple', ),
+        'url': ('URL', 'QueryString'),
+    }
+
+_lazy = dict((name, module) for module, names in _exports.items() for name in names)
+
+__all__ = sorted(_lazy)
+
+
+def __getattr__(name):
+    try:
+        module = _lazy[name]
+
+    except KeyError:
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+
+    value = getattr(__import__(__name__ + '.' + module, fromlist=[name]), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy))
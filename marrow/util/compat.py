@@ -9,7 +9,6 @@ being made to support Python 3.x.
 
 from __future__ import with_statement
 import sys
-import traceback
 
 
 __all__ = ['formatdate', 'unquote', 'range', 'execfile', 'exception', 'binary',
@@ -18,7 +17,6 @@ __all__ = ['formatdate', 'unquote', 'range', 'execfile', 'exception', 'binary',
 
 
 if sys.version_info < (3, 0):  
-    from email.utils import formatdate # DEPRECATE
     from urllib import unquote_plus as unquote
     from urlparse import parse_qsl
     basestring = basestring
@@ -28,12 +26,7 @@ if sys.version_info < (3, 0):
     execfile = execfile
 
 else:  # pragma: no cover
-    from email.utils import formatdate # DEPRECATE
-    from urllib.parse import unquote_plus as unquote_
-    try:
-        from cgi import parse_qsl
-    except:
-        from urllib.parse import parse_qsl
+    from urllib.parse import unquote_plus as unquote_, parse_qsl
     basestring = str
     binary = bytes = bytes
     unicode = str
@@ -55,6 +48,16 @@ else:  # pragma: no cover
         return unquote_(t.decode('iso-8859-1')).encode('iso-8859-1')
 
 
+def formatdate(timeval=None, localtime=False, usegmt=False): # DEPRECATE
+    """Format a date as per RFC 2822; see email.utils.formatdate.
+
+    The email package is only imported when this is first called.
+    """
+
+    from email.utils import formatdate
+    return formatdate(timeval, localtime, usegmt)
+
+
 def exception(maxTBlevel=None):
     """Retrieve useful information about an exception.
 
@@ -71,6 +74,8 @@ def exception(maxTBlevel=None):
     differences between Python 2.x and 3.x.
     """
 
+    import traceback
+
     try:
         from marrow.util.bunch import Bunch
 
@@ -3,15 +3,46 @@
 """Useful datatype converters."""
 
 import re
-import collections
-import inspect
+
+from array import array as _array
+from functools import partial
+from itertools import chain
+from types import MappingProxyType
 
 from marrow.util.compat import binary, unicode
 
 
-__all__ = ['boolean', 'array', 'integer', 'number', 'KeywordProcessor', 'tags', 'terms']
+__all__ = ['boolean', 'boolean_many', 'array', 'iter_array', 'integer', 'integers', 'number', 'numbers', 'KeywordProcessor', 'tags', 'terms',
+        'RecordConverter', 'ConversionError']
+
 
 
+def _cases(word):
+    """Return every upper and lower case spelling of an ASCII word."""
+    
+    variants = ['']
+    
+    for char in word:
+        variants = [prefix + case for prefix in variants for case in set((char.lower(), char.upper()))]
+    
+    return variants
+
+
+def _boolean_table():
+    table = dict()
+    
+    for value, words in ((True, ('yes', 'y', 'on', 'true', 't', '1')), (False, ('no', 'n', 'off', 'false', 'f', '0'))):
+        for word in words:
+            for variant in _cases(word):
+                table[variant] = value
+                table[variant.encode('ascii')] = value
+    
+    return table
+
+
+# Every accepted spelling, in every case, as text and as bytes; lookups only fall back to stripping on a miss.
+_booleans = _boolean_table()
+
 
 def boolean(input):
     """Convert the given input to a boolean value.
@@ -46,18 +77,74 @@ def boolean(input):
     :rtype: bool
     """
     
+    try:
+        return _booleans[input]
+    except (KeyError, TypeError):
+        pass
+    
     try:
         input = input.strip().lower()
     except AttributeError:
         return bool(input)
     
-    if input in ('yes', 'y', 'on', 'true', 't', '1'):
-        return True
+    try:
+        return _booleans[input]
+    except KeyError:
+        raise ValueError("Unable to convert {0!r} to a boolean value.".format(input))
+
+
+def boolean_many(values):
+    """Convert many values to booleans using the rules of :func:`boolean`.
+    
+    Returns a list, or a boolean array if given a NumPy array of text or
+    bytes, in which case each distinct string is converted only once.
+    
+    :param values: the values to convert
+    :type values: iterable
+    
+    :returns: converted boolean values
+    :rtype: list or numpy.ndarray
+    
+    :raises ValueError: if any value can not be converted
+    """
+    
+    if getattr(getattr(values, 'dtype', None), 'kind', None) in ('U', 'S'):
+        return _boolean_array(values)
     
-    if input in ('no', 'n', 'off', 'false', 'f', '0'):
-        return False
+    if not isinstance(values, (list, tuple)):
+        values = list(values)
     
-    raise ValueError("Unable to convert {0!r} to a boolean value.".format(input))
+    try:
+        results = list(map(_booleans.get, values))
+    except TypeError: # Unhashable values are passed to bool().
+        return [boolean(value) for value in values]
+    
+    # Only values not spelled exactly as in the table need the slow path; find them without a Python-level loop.
+    find, converted, i = results.index, dict(), 0
+    
+    while True:
+        try:
+            i = find(None, i)
+        except ValueError:
+            return results
+        
+        value = values[i]
+        result = converted.get(value)
+        
+        if result is None:
+            result = converted[value] = boolean(value)
+        
+        results[i] = result
+        i += 1
+
+
+def _boolean_array(values):
+    import numpy
+    
+    unique, inverse = numpy.unique(values, return_inverse=True)
+    table = numpy.array([boolean(value) for value in unique.tolist()], dtype=bool)
+    
+    return table[inverse].reshape(values.shape)
 
 
 def array(input, separator=',', strip=True, empty=False):
@@ -118,6 +205,92 @@ def array(input, separator=',', strip=True, empty=False):
     return [i.strip() for i in input.split(separator)]
 
 
+def _chunks(input, size):
+    if hasattr(input, 'read'):
+        while True:
+            chunk = input.read(size)
+            
+            if not chunk:
+                return
+            
+            yield chunk
+    
+    if isinstance(input, (bytearray, memoryview)):
+        view = memoryview(input)
+        
+        for offset in range(0, len(view), size):
+            yield view[offset:offset + size].tobytes()
+        
+        return
+    
+    for offset in range(0, len(input), size):
+        yield input[offset:offset + size]
+
+
+def iter_array(input, separator=',', strip=True, empty=False, size=65536):
+    """Lazily generate the values :func:`array` would return.
+    
+    Strings, bytes, bytearrays, memoryviews, and file-like objects are split
+    ``size`` characters or bytes at a time, so only one chunk and the value
+    spanning its end are held in memory, however large the input.  Values
+    from binary sources are bytes; a textual separator is encoded as ASCII.
+    Other iterables have their values generated as-is.
+    
+    :param input: the value to split
+    :param separator: The character (or string) to use to split the
+                      input.  May be None to split on any whitespace.
+    :param strip: If True, the values found by splitting will be stripped
+                  of extraneous whitespace.
+    :param empty: If True, allow empty list items.
+    :param size: The number of characters or bytes to read at a time.
+    """
+    
+    if input is None:
+        return
+    
+    if not hasattr(input, 'read') and not isinstance(input, (binary, unicode, bytearray, memoryview)):
+        for i in input:
+            if i or empty:
+                yield i
+        
+        return
+    
+    tail = None
+    
+    for chunk in _chunks(input, size):
+        if tail is None and separator is not None and isinstance(chunk, binary) and isinstance(separator, unicode):
+            separator = separator.encode('ascii')
+        
+        pending = chunk if tail is None else tail + chunk
+        parts = pending.split(separator)
+        
+        # The last part may continue in the next chunk; this also rejoins a separator split between chunks.
+        if separator is not None or not pending[-1:].isspace():
+            tail = parts.pop() if parts else pending[:0]
+        
+        else:
+            tail = pending[:0]
+        
+        for part in parts:
+            if strip:
+                part = part.strip()
+            
+            if part or empty:
+                yield part
+    
+    if tail is None:  # Empty input, which splits to a single empty value.
+        tail = input.read(0) if hasattr(input, 'read') else input[:0] if isinstance(input, (binary, unicode)) else b''
+    
+    if separator is None and not tail:
+        return
+    
+    if strip:
+        tail = tail.strip()
+    
+    if tail or empty:
+        yield tail
+
+
 def integer(input):
     """Convert the given input to an integer value.
     
@@ -157,6 +330,137 @@ def number(input):
         raise ValueError("Unable to convert {0!r} to a number.".format(input))
 
 
+def _fields(values, separator):
+    """Split text or byte buffers into fields; return other iterables as a sequence."""
+    
+    if isinstance(values, (bytearray, memoryview)):
+        values = bytes(values)
+    
+    if isinstance(values, binary):
+        if isinstance(separator, unicode):
+            separator = separator.encode('ascii')
+        
+        return values.split(separator)
+    
+    if isinstance(values, unicode):
+        return values.split(separator)
+    
+    if isinstance(values, (list, tuple)):
+        return values
+    
+    return list(values)
+
+
+def _finish(result, invalid, numpy):
+    if numpy:
+        import numpy
+        result = numpy.frombuffer(result, dtype=result.typecode)
+    
+    return result, invalid
+
+
+def integers(values, separator=None, default=0, numpy=False):
+    """Convert many values to integers using the rules of :func:`integer`.
+    
+    Values which can not be converted, or do not fit in a signed 64-bit
+    integer, are replaced by the default and their positions reported
+    rather than raising.
+    
+    :param values: an iterable of values, or a string or byte buffer of fields
+    :param separator: the separator between fields of a string or buffer; None splits on whitespace
+    :param default: the value stored in place of invalid values
+    :param numpy: return a NumPy array rather than an :class:`array.array`
+    
+    :returns: a tuple of the converted values and a list of invalid positions
+    :rtype: tuple
+    """
+    
+    values = _fields(values, separator)
+    result, invalid, remaining = _array('q'), [], iter(values)
+    
+    while True:
+        # Array extension keeps the values converted before a failure, so resume just past it.
+        try:
+            result.extend(map(int, remaining))
+        except (TypeError, ValueError, OverflowError):
+            invalid.append(len(result))
+            result.append(default)
+        else:
+            return _finish(result, invalid, numpy)
+
+
+def numbers(values, separator=None, default=0, numpy=False):
+    """Convert many values to numbers using the rules of :func:`number`.
+    
+    If every valid value is an integer the result holds signed 64-bit
+    integers, otherwise double precision floating point numbers.  Invalid
+    values are replaced by the default and their positions reported rather
+    than raising.
+    
+    Unlike calling :func:`number` on each value, floating point values are
+    not each first attempted (and failed) as integers: conversion switches to
+    floating point for the remainder of the input at the first value requiring
+    it.  Numbers which are not integers, such as floats, are never truncated,
+    wherever they appear; if any are present the whole input is converted as
+    floating point.
+    
+    :param values: an iterable of values, or a string or byte buffer of fields
+    :param separator: the separator between fields of a string or buffer; None splits on whitespace
+    :param default: the value stored in place of invalid values
+    :param numpy: return a NumPy array rather than an :class:`array.array`
+    
+    :returns: a tuple of the converted values and a list of invalid positions
+    :rtype: tuple
+    """
+    
+    from numbers import Integral, Number
+    
+    values = _fields(values, separator)
+    result, invalid, convert, remaining = _array('q'), [], int, iter(values)
+    
+    # int() would truncate these, so results would depend on whether they precede the switch to floating point.
+    if any(issubclass(kind, Number) and not issubclass(kind, Integral) for kind in set(map(type, values))):
+        result, convert = _array('d'), float
+    
+    while True:
+        try:
+            result.extend(map(convert, remaining))
+        except (TypeError, ValueError, OverflowError):
+            pass
+        else:
+            return _finish(result, invalid, numpy)
+        
+        position = len(result)
+        
+        if convert is int:
+            try:
+                value = float(values[position])
+            except (TypeError, ValueError, OverflowError):
+                pass
+            else:
+                result, convert = _array('d', result), float
+                result.append(value)
+                continue
+        
+        invalid.append(position)
+        result.append(default)
+
+
+def _freeze(value):
+    """Return an immutable copy of a split result."""
+    
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    
+    if isinstance(value, dict):
+        return MappingProxyType(dict((key, _freeze(item)) for key, item in value.items()))
+    
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    
+    return value
+
+
 class KeywordProcessor(object):
     """Process user-supplied keywords, tags, or search terms.
     
@@ -169,7 +473,7 @@ class KeywordProcessor(object):
     you automatically as :data:`tags` and :data:`terms`.
     """
     
-    def __init__(self, separators=' \t', quotes="\"'", groups=[], group=False, normalize=None, sort=False, result=list):
+    def __init__(self, separators=' \t', quotes="\"'", groups=[], group=False, normalize=None, sort=False, result=list, engine='regex', cache=0):
         """Configure the processor.
         
         :param separators: A list of acceptable separator characters.  The first will be used for joins.
@@ -181,10 +485,26 @@ class KeywordProcessor(object):
         :param normalize: Pass a function which will normalize the results.  E.g. lambda s: s.lower().strip(' \"')
         :param sort: Sort the resulting list (or lists) alphabeticlly.
         :param result: The return type.  One of set, tuple, list.
+        :param engine: How text is split: 'regex' to use the generated regular expression, or 'scanner'.
+        :param cache: The number of split results to retain, least recently used first discarded.  Zero to disable.
         
         If groups are defined, and group is not, the result will be a list/tuple/set of tuples, e.g. [('+', "foo"), ...]
+        
+        The scanner tokenizes, normalizes, and groups in a single loop, splitting on separators using
+        :meth:`str.split` when the value contains no quotes.  It differs from the regular expression only
+        in edge cases: whitespace which is not a separator is never returned on its own, and values
+        without a group prefix are still found when groups are given without None.  Byte strings are
+        always split using the regular expression.
+        
+        Cached results are made immutable, as they are shared between callers: lists become tuples, sets
+        frozensets, and dictionaries read-only mappings.  Cache usage is counted in the ``hits`` and
+        ``misses`` attributes and summarized by :meth:`stats`.  Clear the cache using :meth:`clear` after
+        reconfiguring a processor.
         """
         
+        if engine not in ('regex', 'scanner'):
+            raise ValueError("Unknown engine {0!r}; expected 'regex' or 'scanner'.".format(engine))
+        
         self.separators = separators = list(separators)
         self.quotes = quotes = list(quotes) if quotes else []
         
@@ -204,6 +524,29 @@ class KeywordProcessor(object):
         self.normalize = normalize
         self.sort = sort
         self.result = result
+        self.engine = engine
+        
+        # Scanner state: separators collapse to the first so that a single str.split finds every token.
+        self._prefixes = frozenset(i for i in self.groups if i is not None)
+        self._keys = self.groups + ([] if None in self.groups else [None])
+        self._slots = dict((key, i) for i, key in enumerate(self._keys) if key is not None)
+        self._ungrouped = self._keys.index(None)
+        self._blanks = frozenset(separators)
+        self._collapse = tuple(i for i in separators[1:] if i != separators[0])
+        self._boundary = re.compile('[%s]' % (re.escape(''.join(separators)), ))
+        
+        self.hits = self.misses = 0
+        self._prepare(cache)
+    
+    def _prepare(self, capacity):
+        self._cache = None
+        
+        if capacity:
+            import threading
+            from marrow.util.object import Cache
+            
+            self._cache = Cache(capacity)
+            self._lock = threading.Lock()
     
     def __call__(self, value):
         if isinstance(value, (binary, unicode)):
@@ -214,6 +557,53 @@ class KeywordProcessor(object):
     def split(self, value):
         if not isinstance(value, (binary, unicode)): raise TypeError("Invalid type for argument 'value'.")
         
+        cache = self._cache
+        
+        if cache is None:
+            return self._split(value)
+        
+        with self._lock:
+            try:
+                result = cache[value]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                return result
+        
+        result = _freeze(self._split(value))
+        
+        with self._lock:
+            cache[value] = result
+        
+        return result
+    
+    def stats(self):
+        """Return a dictionary of counters describing result cache usage."""
+        
+        lookups = self.hits + self.misses
+        
+        return dict(
+                hits = self.hits,
+                misses = self.misses,
+                ratio = float(self.hits) / lookups if lookups else 0.0,
+                size = len(self._cache) if self._cache is not None else 0,
+                capacity = self._cache.capacity if self._cache is not None else 0
+            )
+    
+    def clear(self):
+        """Empty the result cache and reset the counters."""
+        
+        if self._cache is not None:
+            with self._lock:
+                self._cache.clear()
+        
+        self.hits = self.misses = 0
+    
+    def _split(self, value):
+        if self.engine == 'scanner' and isinstance(value, unicode):
+            return self._scan(value)
+        
         matches = self.regex.findall(value)
         
         if hasattr(self.normalize, '__call__'): matches = [self.normalize(i) for i in matches]
@@ -241,31 +631,411 @@ class KeywordProcessor(object):
         
         return self.group([[match for match in groups[group]] for group in self.groups])
     
-    def join(self, values):
-        def sanatize(keyword):
-            if not self.quotes:
-                return keyword
+    def _plain(self, value):
+        """Split a value, or part of one, in which quotes have no special meaning."""
+        
+        separator = self.separators[0]
+        
+        for other in self._collapse:
+            if other in value:
+                value = value.replace(other, separator)
+        
+        return value.split(separator)
+    
+    def _opening(self, value, index, position):
+        """Determine if the token containing the character at index begins there."""
+        
+        blanks = self._blanks
+        
+        while index > position:
+            index -= 1
+            char = value[index]
             
-            for sep in self.separators:
-                if sep in keyword:
-                    return self.quotes[0] + keyword + self.quotes[0]
+            if char in blanks:
+                return True
             
-            return keyword
+            if not char.isspace():
+                return False
         
-        if self.group is dict:
-            if not isinstance(values, dict):
-                raise ValueError("Dictionary grouped values must be passed as a dictionary.") # pragma: no cover
+        return True
+    
+    def _quoted(self, value, quote):
+        """Return the raw tokens of a value containing one kind of quote, if simply quoted, otherwise None."""
+        
+        parts = value.split(quote)  # Alternately outside and inside quotes.
+        
+        if not len(parts) % 2:
+            return None
+        
+        prefixes = self._prefixes if quote == self.quotes[0] else ()
+        blanks, plain = self._blanks, self._plain
+        tokens, outside = [], parts[0]
+        
+        for i in range(1, len(parts), 2):
+            inside, end = parts[i], len(outside)
+            
+            if not inside:
+                return None
+            
+            if end and outside[-1] in prefixes:
+                end -= 1
+            
+            if end and outside[end - 1] not in blanks:
+                return None  # The quote opens within a token.
             
-            return self.separators[0].join([(prefix + sanatize(keyword)) for prefix, keywords in values for keyword in values[prefix]])
+            tokens.extend(plain(outside[:end]))
+            tokens.append(outside[end:] + quote + inside + quote)
+            outside = parts[i + 1]
         
-        if not isinstance(values, (list, tuple, set)):
-            raise ValueError("Ungrouped values must be passed as a list, tuple, or set.")
+        tokens.extend(plain(outside))
+        
+        return tokens
+    
+    def _tokens(self, value):
+        """Return the raw tokens of a value, scanning by hand only around quotes."""
+        
+        first, prefixes, blanks, boundary = self.quotes[0], self._prefixes, self._blanks, self._boundary.search
+        tokens, position, length = [], 0, len(value)
+        upcoming = dict((quote, value.find(quote)) for quote in self.quotes)  # The next occurrence of each quote.
+        
+        while position < length:
+            for quote, index in list(upcoming.items()):
+                if index < position:
+                    index = upcoming[quote] = value.find(quote, position)
+                    
+                    if index == -1:
+                        del upcoming[quote]
+            
+            if not upcoming:
+                break
+            
+            index = min(upcoming.values())
+            quote = value[index]
+            start = index - 1 if index > position and quote == first and value[index - 1] in prefixes else index
+            
+            if start == position or value[start - 1] in blanks or self._opening(value, start, position):
+                tokens.extend(self._plain(value[position:start]))
+                
+                position = start
+                close = value.find(quote, index + 2) if value[index + 1:index + 2] != quote else -1
+                
+                if close != -1:
+                    position = close + 1
+                    tokens.append(value[start:position])
+                    continue
+            
+            # An unmatched quote or one within a token; the token runs to the next separator.
+            match = boundary(value, index)
+            end = match.start() if match else length
+            
+            tokens.extend(self._plain(value[position:end]))
+            
+            position = end
+        
+        tokens.extend(self._plain(value[position:]))
+        
+        return tokens
+    
+    def _scan(self, value):
+        present = [quote for quote in self.quotes if quote in value]
+        
+        if not present:
+            tokens = self._plain(value)
+        
+        else:
+            tokens = self._quoted(value, present[0]) if len(present) == 1 else None
+            
+            if tokens is None:
+                tokens = self._tokens(value)
         
-        return self.separators[0].join([sanatize(keyword) for keyword in values])
+        normalize, groups = self.normalize, self.groups
+        
+        if not groups:
+            if normalize is None:
+                matches = [token for token in map(unicode.lstrip, tokens) if token]
+            
+            else:
+                matches = [normalize(token) for token in map(unicode.lstrip, tokens) if token]
+            
+            if self.sort: matches.sort()
+            return self.result(matches)
+        
+        keys, slot = self._keys, self._slots.get
+        buckets = [[] for key in keys]
+        ungrouped = buckets[self._ungrouped]
+        
+        for token in tokens:
+            token = token.lstrip()
+            
+            if not token:
+                continue
+            
+            if normalize is not None:
+                token = normalize(token)
+            
+            index = slot(token[:1])
+            
+            if index is None:
+                ungrouped.append(token)
+            
+            else:
+                buckets[index].append(token[1:])
+        
+        if self.sort:
+            for matches in buckets:
+                matches.sort()
+        
+        # Buckets are ordered as the groups, followed by one for ungrouped values if None is not a group.
+        if self.group is dict: return dict(zip(keys, buckets))
+        
+        if self.group is False or self.group is None:
+            return self.result([(group, match) for group, matches in zip(groups, buckets) for match in matches])
+        
+        return self.group(buckets[:len(groups)])
+    
+    def join(self, values):
+        return self._joiner()(values)
+    
+    def _joiner(self):
+        return partial(_join, self.separators[0], self.quotes[0] if self.quotes else None, self._boundary, self.group is dict)
+    
+    def split_many(self, values, processes=None, chunksize=1000):
+        """Lazily split many values, in order.
+        
+        If ``processes`` is given the values are split in chunks of ``chunksize`` by a pool of that many
+        worker processes, with a bounded number of chunks in flight so memory use stays flat.  This
+        requires a picklable processor: any ``normalize`` function must be defined at module scope.
+        Each worker process keeps its own result cache.
+        """
+        
+        if processes:
+            return _parallel(partial(_split_all, self), values, processes, chunksize)
+        
+        return map(self.split, values)
+    
+    def join_many(self, records, processes=None, chunksize=1000):
+        """Lazily join the values of many records, in order.
+        
+        Whether each keyword needs quoting is decided by a single precompiled regular expression.  The
+        ``processes`` and ``chunksize`` arguments are as for :meth:`split_many`.
+        """
+        
+        joiner = self._joiner()
+        
+        if processes:
+            return _parallel(partial(_join_all, joiner), records, processes, chunksize)
+        
+        return map(joiner, records)
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_lock', None)
+        state['_cache'] = self._cache.capacity if self._cache is not None else 0
+        state['hits'] = state['misses'] = 0
+        return state
+    
+    def __setstate__(self, state):
+        capacity = state.pop('_cache')
+        self.__dict__.update(state)
+        self._prepare(capacity)  # Unpickled copies, such as in worker processes, start with their own empty cache.
+
+
+def _join(separator, quote, boundary, grouped, values):
+    search = boundary.search
+    
+    if grouped:
+        if not isinstance(values, (dict, MappingProxyType)):
+            raise ValueError("Dictionary grouped values must be passed as a dictionary.") # pragma: no cover
+        
+        if quote is None:
+            return separator.join([(prefix or '') + keyword for prefix, keywords in values.items() for keyword in keywords])
+        
+        return separator.join([(prefix or '') + ((quote + keyword + quote) if search(keyword) else keyword)
+                for prefix, keywords in values.items() for keyword in keywords])
+    
+    if not isinstance(values, (list, tuple, set, frozenset)):
+        raise ValueError("Ungrouped values must be passed as a list, tuple, or set.")
+    
+    if quote is None:
+        return separator.join(values)
+    
+    return separator.join([(quote + keyword + quote) if search(keyword) else keyword for keyword in values])
+
+
+def _join_all(joiner, records):
+    return [joiner(record) for record in records]
+
+
+def _split_all(processor, values):
+    return [processor.split(value) for value in values]
+
+
+def _parallel(function, values, processes, chunksize):
+    """Apply a function to chunks of values in a process pool, generating the results in order."""
+    
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    from itertools import islice
+    
+    values = iter(values)
+    
+    with ProcessPoolExecutor(processes) as executor:
+        pending = deque()
+        
+        while True:
+            while len(pending) < processes * 2:
+                chunk = list(islice(values, chunksize))
+                
+                if not chunk:
+                    break
+                
+                pending.append(executor.submit(function, chunk))
+            
+            if not pending:
+                return
+            
+            for result in pending.popleft().result():
+                yield result
+
 
+def _tag(value):
+    return value.lower().strip('"')
 
-tags = KeywordProcessor(' \t,', normalize=lambda s: s.lower().strip('"'), sort=True, result=set)
+
+tags = KeywordProcessor(' \t,', normalize=_tag, sort=True, result=set)
 tags.__doc__ = 'A lowercase-normalized ungrouped tagset processor, returning only unique tags.'
 
 terms = KeywordProcessor(groups=[None, '+', '-'], group=tuple)
 terms.__doc__ = 'A search keyword processor which retains quotes and groups into a dictionary of lists.'
+
+
+class ConversionError(ValueError):
+    """Raised when fields of a record can not be converted.
+    
+    The ``errors`` attribute maps each failed field to the exception raised, and ``result`` holds the
+    record as converted, with the default in place of each failed field.
+    """
+    
+    def __init__(self, errors, result=None):
+        super(ConversionError, self).__init__("Unable to convert fields: {0}".format(', '.join(repr(i) for i in errors)))
+        self.errors = errors
+        self.result = result
+
+
+# Source of the converters generated for each record schema; the expression converts a whole row.
+_record_template = (
+        "def convert(row):\n"
+        "    return {0}\n"
+        "\n"
+        "def many(rows):\n"
+        "    for row in rows:\n"
+        "        try:\n"
+        "            result = {0}\n"
+        "        except failures:\n"
+        "            yield slow(row)\n"
+        "            continue\n"
+        "        yield result, None\n"
+    )
+
+
+class RecordConverter(object):
+    """Convert whole records using a schema compiled into a specialized function.
+    
+    The schema maps field names to converters, such as :func:`boolean`, :func:`integer`, or :data:`tags`,
+    or to None to pass a value through unchanged; pass a list of pairs to fix the field order.  Records
+    may be dictionaries, converted into dictionaries of the schema's fields, or sequences with values in
+    schema order, converted into tuples.
+    
+    Each record is first converted by straight-line code generated for the schema, with no per-field
+    dispatch or exception handling; only a record which fails is converted again one field at a time to
+    collect every error.  Failed fields take the ``default`` value.
+    
+    Calling the converter converts one record, raising :class:`ConversionError` if any field fails.
+    :meth:`many` lazily converts many records, generating ``(result, errors)`` pairs where errors is None
+    or a dictionary mapping each failed field to the exception raised.
+    """
+    
+    # Exceptions blamed on the value being converted rather than on the converter.
+    failures = (TypeError, ValueError, KeyError, IndexError)
+    
+    def __init__(self, schema, default=None):
+        self.schema = list(schema.items() if isinstance(schema, dict) else schema)
+        self.fields = tuple(field for field, convert in self.schema)
+        self.default = default
+        
+        self._mapping, self._many_mapping = self._compile(True)
+        self._sequence, self._many_sequence = self._compile(False)
+    
+    def _compile(self, mapped):
+        namespace = dict(_booleans=_booleans, failures=self.failures, slow=self._convert)
+        parts = []
+        
+        for i, (field, convert) in enumerate(self.schema):
+            key = repr(field) if type(field) in (str, unicode, int) else 'k{0}'.format(i)
+            namespace['k{0}'.format(i)] = field
+            value = 'row[{0}]'.format(key if mapped else i)
+            
+            if convert is integer:
+                value = 'int({0})'.format(value)  # Succeeds exactly when integer() would.
+            
+            elif convert is boolean:
+                value = '_booleans[{0}]'.format(value)  # Exact spellings; others fail over to boolean().
+            
+            elif convert is not None:
+                namespace['c{0}'.format(i)] = convert
+                value = 'c{0}({1})'.format(i, value)
+            
+            parts.append('{0}: {1}'.format(key, value) if mapped else value + ', ')
+        
+        expression = ('{{{0}}}' if mapped else '({0})').format((', ' if mapped else '').join(parts))
+        exec(compile(_record_template.format(expression), '<RecordConverter>', 'exec'), namespace)
+        
+        return namespace['convert'], namespace['many']
+    
+    def _convert(self, row):
+        """Convert a record one field at a time, returning the result and any errors."""
+        
+        mapped = isinstance(row, dict)
+        values, errors, failures, default = [], {}, self.failures, self.default
+        
+        for i, (field, convert) in enumerate(self.schema):
+            try:
+                value = row[field] if mapped else row[i]
+                
+                if convert is not None:
+                    value = convert(value)
+            
+            except failures as exception:
+                errors[field] = exception
+                value = default
+            
+            values.append(value)
+        
+        return (dict(zip(self.fields, values)) if mapped else tuple(values)), (errors or None)
+    
+    def __call__(self, row):
+        try:
+            return (self._mapping if isinstance(row, dict) else self._sequence)(row)
+        except self.failures:
+            pass
+        
+        result, errors = self._convert(row)
+        
+        if errors:
+            raise ConversionError(errors, result)
+        
+        return result
+    
+    def many(self, rows):
+        """Lazily convert many records, generating (result, errors) pairs.
+        
+        The generated code used is chosen by the type of the first record; later records of the other
+        type are still converted, but one field at a time.
+        """
+        
+        rows = iter(rows)
+        
+        for first in rows:
+            return (self._many_mapping if isinstance(first, dict) else self._many_sequence)(chain((first, ), rows))
+        
+        return iter(())
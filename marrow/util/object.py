@@ -2,36 +2,145 @@
 
 """Object instance and class helper functions."""
 
+import os
+import sys
 import logging
-import inspect
-import pkg_resources
+import threading
+import time
+import weakref
 
 from collections import defaultdict
-from functools import partial
+from functools import partial, update_wrapper
+from itertools import count
+from operator import attrgetter, itemgetter
 
-from marrow.util.compat import binary, unicode
+from marrow.util.compat import binary, unicode, native
 
 
-def flatten(x):
-    """flatten(sequence) -> list
+log = logging.getLogger(__name__)
 
-    Returns a single, flat list which contains all elements retrieved
-    from the sequence and all recursively contained sub-sequences
-    (iterables).
+
+# Types which are never descended into when flattening; strings are iterable but atomic.
+_ATOMS = frozenset((int, float, complex, bool, str, binary, unicode, type(None)))
+
+
+def flatten(x, max_depth=None):
+    """flatten(sequence) -> iterator
+
+    Yields all elements retrieved from the sequence and all recursively
+    contained sub-sequences (iterables), excluding strings.  Nesting below
+    ``max_depth`` levels is yielded as-is; by default all levels are
+    flattened.  Nesting is tracked using an explicit stack of iterators, so
+    arbitrarily deep input does not approach the recursion limit.
 
     Examples:
     >>> [1, 2, [3,4], (5,6)]
     [1, 2, [3, 4], (5, 6)]
-    >>> flatten([[[1,2,3], (42,None)], [4,5], [6], 7, MyVector(8,9,10)])
+    >>> list(flatten([[[1,2,3], (42,None)], [4,5], [6], 7, MyVector(8,9,10)]))
     [1, 2, 3, 42, None, 4, 5, 6, 7, 8, 9, 10]
+    >>> list(flatten([1, [2, [3, [4]]]], max_depth=1))
+    [1, 2, [3, [4]]]
+    """
+
+    atoms = _ATOMS
+    stack = [iter(x)]
+    push, pop = stack.append, stack.pop
+
+    while stack:
+        for el in stack[-1]:
+            if type(el) in atoms or (max_depth is not None and len(stack) > max_depth) or \
+                    not hasattr(el, '__iter__') or isinstance(el, (binary, unicode)):
+                yield el
+                continue
+
+            push(iter(el))
+            break
+
+        else:
+            pop()
+
+
+def flat(x, max_depth=None, numeric=False):
+    """Flatten a sequence into a new list; see :func:`flatten`.
+
+    Nested lists and tuples which only contain scalars are copied in a single
+    ``extend`` rather than element by element, making this considerably faster
+    than ``list(flatten(x))`` for wide input.
+
+    If ``numeric`` is true the result is returned as a NumPy array, if NumPy is
+    installed, or an :class:`array.array` of integers or floats otherwise.
+    NumPy arrays passed in are simply raveled.  A TypeError is raised if the
+    values are not all numeric.
     """
 
-    for el in x:
-        if hasattr(el, "__iter__") and not isinstance(el, (binary, unicode)):
-            for els in flatten(el):
-                yield els
+    if numeric and type(x).__module__ == 'numpy' and hasattr(x, 'ravel'):
+        return x.ravel()
+
+    atoms = _ATOMS
+    result = []
+    append, extend = result.append, result.extend
+    stack = [iter(x)]
+    push, pop = stack.append, stack.pop
+
+    while stack:
+        for el in stack[-1]:
+            kind = type(el)
+
+            if kind in atoms:
+                append(el)
+                continue
+
+            if max_depth is not None and len(stack) > max_depth:
+                append(el)
+                continue
+
+            if kind is list or kind is tuple:
+                if (max_depth is not None and len(stack) >= max_depth) or atoms.issuperset(map(type, el)):
+                    extend(el)
+                    continue
+
+            elif not hasattr(el, '__iter__') or isinstance(el, (binary, unicode)):
+                append(el)
+                continue
+
+            push(iter(el))
+            break
+
         else:
-            yield el
+            pop()
+
+    if not numeric:
+        return result
+
+    return _numeric(result)
+
+
+def _numeric(values):
+    try:
+        import numpy
+
+    except ImportError:
+        numpy = None
+
+    if numpy is not None:
+        result = numpy.array(values)
+
+        if result.dtype.kind not in 'biuf':
+            raise TypeError("Unable to represent non-numeric values as a numeric array.")
+
+        return result
+
+    from array import array
+
+    kinds = set(map(type, values))
+
+    if kinds <= set((int, bool)):
+        return array('q', values)
+
+    if kinds <= set((int, bool, float)):
+        return array('d', values)
+
+    raise TypeError("Unable to represent non-numeric values as a numeric array.")
 
 
 def yield_property(iterable, name, default=None):
@@ -39,7 +148,73 @@ def yield_property(iterable, name, default=None):
 
 
 def yield_keyvalue(iterable, key, default=None):
-    for i in iterable: yield i[key] if key in iterable else default
+    for i in iterable:
+        try:
+            yield i[key]
+
+        except (KeyError, IndexError):
+            yield default
+
+
+def extract_columns(records, fields, default=None, items=False, numeric=False):
+    """Extract several fields from every record, returning one list per field.
+
+    Fields are read as attributes, or as keys or indexes if ``items`` is true.
+    The records are first processed by a single compiled
+    :func:`operator.attrgetter` or :func:`operator.itemgetter`; only if a field
+    is missing from some record is each record reprocessed field by field,
+    substituting ``default`` (or ``default[field]`` if a dictionary is given).
+
+    If ``numeric`` is true, or a collection of field names, the matching
+    columns are returned as NumPy or :class:`array.array` arrays as per
+    :func:`flat`.
+
+    For example:
+
+        names, ages = extract_columns(people, ('name', 'age'), numeric=['age'])
+    """
+
+    fields = list(fields)
+
+    if not fields:
+        return []
+
+    factory = itemgetter if items else attrgetter
+    missing = (KeyError, IndexError) if items else AttributeError
+    records = records if isinstance(records, (list, tuple)) else list(records)
+
+    try:
+        rows = list(map(factory(*fields), records))
+
+    except missing:
+        defaults = default if isinstance(default, dict) else dict((field, default) for field in fields)
+        getters = [(factory(field), defaults.get(field)) for field in fields]
+        rows = [_extract_row(record, getters, missing) for record in records]
+
+    else:
+        if len(fields) == 1:
+            rows = [(row, ) for row in rows]
+
+    columns = [list(column) for column in zip(*rows)] if rows else [[] for field in fields]
+
+    if numeric:
+        wanted = fields if numeric is True else numeric
+        columns = [_numeric(column) if field in wanted else column for field, column in zip(fields, columns)]
+
+    return columns
+
+
+def _extract_row(record, getters, missing):
+    row = []
+
+    for getter, default in getters:
+        try:
+            row.append(getter(record))
+
+        except missing:
+            row.append(default)
+
+    return row
 
 
 class _NoDefault(object):
@@ -49,20 +224,318 @@ NoDefault = _NoDefault()
 
 
 def merge(s, t):
-    """Merge dictionary t into s."""
+    """Merge dictionary t into s.
+
+    Nested dictionaries are merged recursively.  Nested dictionaries from t
+    are copied into s rather than referenced, so later changes to either do
+    not affect the other; other values are not copied.
+    """
+
+    stack = [(s, t)]
 
-    for k, v in t.items():
-        if isinstance(v, dict):
-            if k not in s:
-                s[k] = v
+    while stack:
+        target, source = stack.pop()
+
+        for k, v in source.items():
+            if isinstance(v, dict):
+                existing = target.get(k)
+
+                if not isinstance(existing, dict):
+                    existing = target[k] = dict()
+
+                stack.append((existing, v))
                 continue
 
-            s[k] = merge(s[k], v)
+            target[k] = v
+
+    return s
+
+
+class _Layered(dict):
+    """A dictionary which copies nested dictionaries borrowed from other dictionaries the first time they are reached.
+
+    Borrowed values are replaced by a (likewise lazy) shallow copy when read
+    by subscript, ``get``, ``setdefault``, ``pop``, ``popitem``, ``values``,
+    or ``items``, so changes never reach the dictionaries they came from.
+    """
+
+    __slots__ = ('_borrowed', )
+
+    def __init__(self, source=()):
+        super(_Layered, self).__init__()
+        self._borrowed = set()
+
+        if source:
+            self._borrow(source)
+
+    def _borrow(self, source):
+        dict.update(self, source)
+        self._borrowed.update(key for key, value in dict.items(source) if isinstance(value, dict))
+
+    def _own(self, key, value):
+        self._borrowed.discard(key)
+        value = _Layered(value)
+        dict.__setitem__(self, key, value)
+        return value
+
+    def _own_all(self):
+        for key in list(self._borrowed):
+            self._own(key, dict.__getitem__(self, key))
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        return self._own(key, value) if key in self._borrowed else value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+
+        dict.__setitem__(self, key, default)
+        return default
+
+    def pop(self, key, *default):
+        if key in self._borrowed:
+            self._borrowed.discard(key)
+            return _Layered(dict.pop(self, key))
+
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+
+        if key in self._borrowed:
+            self._borrowed.discard(key)
+            value = _Layered(value)
+
+        return key, value
+
+    def values(self):
+        self._own_all()
+        return dict.values(self)
+
+    def items(self):
+        self._own_all()
+        return dict.items(self)
+
+    def copy(self):
+        return _Layered(self)
+
+    def __reduce__(self):
+        # Pickle (and copy) as a plain dictionary; the borrowed values are copied, as by items().
+        return dict, (dict(self.items()), )
+
+    def __setitem__(self, key, value):
+        self._borrowed.discard(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._borrowed.discard(key)
+        dict.__delitem__(self, key)
+
+    def update(self, *args, **kw):
+        for key, value in dict(*args, **kw).items():
+            self[key] = value
+
+    def clear(self):
+        self._borrowed.clear()
+        dict.clear(self)
+
+
+def merge_layers(layers, lists='replace', sets='replace', conflict=None):
+    """Merge a sequence of dictionaries into a new dictionary, later layers taking precedence.
+
+    No layer is modified, now or later.  The result shares structure with the
+    layers: a nested dictionary present in only one layer is not copied until
+    it is first reached through the result, and then only one level at a
+    time, so untouched branches cost nothing however large.  Changes made to
+    the result therefore never reach the layers.  Values other than
+    dictionaries, such as lists, are not copied.
+
+    All layers are merged in a single pass over the combined structure,
+    without recursion.  When layers disagree on a non-dictionary value the
+    later value replaces the earlier unless a strategy applies:
+
+    :param lists: 'replace' or 'append', concatenating lists in layer order
+    :param sets: 'replace' or 'union'
+    :param conflict: a callable accepting the key path (a tuple), the earlier
+                     value, and the later value, returning the value to use;
+                     takes precedence over the list and set strategies
+
+    A dictionary replaces any earlier non-dictionary value and vice versa.
+    """
+
+    if lists not in ('replace', 'append'):
+        raise ValueError("Unknown list merge strategy: {0!r}".format(lists))
+
+    if sets not in ('replace', 'union'):
+        raise ValueError("Unknown set merge strategy: {0!r}".format(sets))
+
+    def combine(path, old, new):
+        if conflict is not None:
+            return conflict(path, old, new)
+
+        if lists == 'append' and isinstance(old, list) and isinstance(new, list):
+            return old + new
+
+        if sets == 'union' and isinstance(old, (set, frozenset)) and isinstance(new, (set, frozenset)):
+            return old | new
+
+        return new
+
+    result = _Layered()
+    pending = [(result, (), [layer for layer in layers if layer])]
+
+    while pending:
+        target, path, sources = pending.pop()
+
+        if len(sources) == 1:
+            target._borrow(sources[0])
             continue
 
-        s[k] = v
+        # Fold each key's values in layer order.  A run of consecutive dictionaries is collected for merging.
+        folded = dict()
 
-    return s
+        for source in sources:
+            for key, value in dict.items(source):
+                if isinstance(value, dict):
+                    kind, current = folded.get(key, (None, None))
+                    folded[key] = (True, current + [value] if kind else [value])
+                    continue
+
+                if key in folded and not folded[key][0]:
+                    value = combine(path + (key, ), folded[key][1], value)
+
+                folded[key] = (False, value)
+
+        for key, (nested, value) in folded.items():
+            if not nested:
+                target[key] = value
+
+            elif len(value) == 1:
+                dict.__setitem__(target, key, value[0])
+                target._borrowed.add(key)
+
+            else:
+                child = target[key] = _Layered()
+                pending.append((child, path + (key, ), value))
+
+    return result
+
+
+_objects = dict()
+_plugins = dict()
+
+ENTRY_POINT_CACHE = os.environ.get('MARROW_UTIL_ENTRY_POINTS')
+
+
+def _metadata():
+    try:
+        from importlib import metadata
+    except ImportError: # pragma: no cover
+        try:
+            import importlib_metadata as metadata
+        except ImportError:
+            metadata = None
+
+    return metadata
+
+
+def _scan_entry_points():
+    """Return a mapping of entry point group to a mapping of name to entry point for all installed distributions."""
+
+    metadata = _metadata()
+    index = defaultdict(dict)
+
+    if metadata is None: # pragma: no cover
+        import pkg_resources
+
+        for distribution in pkg_resources.working_set:
+            for group, entries in distribution.get_entry_map().items():
+                for name, entry in entries.items():
+                    index[group].setdefault(name, entry)
+
+        return index
+
+    entries = metadata.entry_points()
+
+    if isinstance(entries, dict):  # Python 3.8 through 3.11 return a mapping of group to entry points.
+        entries = [i for group in dict.values(entries) for i in group]
+
+    for entry in entries:
+        index[entry.group].setdefault(entry.name, entry)
+
+    return index
+
+
+def _path_signature():
+    signature = []
+
+    for path in sys.path:
+        try:
+            signature.append([path, os.stat(path or '.').st_mtime])
+
+        except OSError:
+            signature.append([path, None])
+
+    return signature
+
+
+def _entry_point_index(refresh=False):
+    """Build the entry point index, using the on-disk cache named by ENTRY_POINT_CACHE if possible.
+
+    The cache is only trusted while the modification times of every sys.path
+    entry are unchanged, i.e. while no distributions have been added or removed.
+    """
+
+    metadata = _metadata() if ENTRY_POINT_CACHE else None
+
+    if metadata is None:
+        return _scan_entry_points()
+
+    import json
+
+    signature = _path_signature()
+
+    if not refresh:
+        try:
+            with open(ENTRY_POINT_CACHE) as fh:
+                cached = json.load(fh)
+
+        except (IOError, OSError, ValueError):
+            cached = None
+
+        if cached and cached.get('signature') == signature:
+            return dict((group, dict((name, metadata.EntryPoint(name, value, group)) for name, value in entries.items()))
+                    for group, entries in cached['index'].items())
+
+    index = _scan_entry_points()
+
+    try:
+        with open(ENTRY_POINT_CACHE, 'w') as fh:
+            json.dump(dict(signature=signature, index=dict((group, dict((name, entry.value) for name, entry in entries.items()))
+                    for group, entries in index.items())), fh)
+
+    except (IOError, OSError):
+        log.warning("Unable to write entry point cache: %s", ENTRY_POINT_CACHE, exc_info=True)
+
+    return index
+
+
+def _plugin_index(namespace, refresh=False):
+    """Return a mapping of plugin names to entry points in a namespace.
+
+    All installed entry points are indexed on first use; subsequent lookups in
+    any namespace are dictionary accesses.
+    """
+
+    if refresh or not _plugins:
+        _plugins.clear()
+        _plugins.update(_entry_point_index(refresh))
+
+    return _plugins.get(namespace, {})
 
 
 def load_object(target, namespace=None):
@@ -79,22 +552,102 @@ def load_object(target, namespace=None):
         load_object('routing', 'web.dispatch')
 
     Providing a namespace does not prevent full object lookup (dot-colon notation) from working.
+
+    Resolved objects are remembered, as is the list of plugins in each namespace; an unknown
+    plugin name triggers one rescan before failing.  Use :func:`invalidate_object` after
+    reloading modules or installing packages at runtime.
     """
+
+    key = (namespace, target) if namespace and ':' not in target else target
+
+    try:
+        return _objects[key]
+
+    except KeyError:
+        pass
+
     if namespace and ':' not in target:
-        allowable = dict((i.name,  i) for i in pkg_resources.iter_entry_points(namespace))
+        allowable = _plugin_index(namespace)
+
+        if target not in allowable:
+            allowable = _plugin_index(namespace, True)
+
         if target not in allowable:
             raise ValueError('Unknown plugin "' + target + '"; found: ' + ', '.join(allowable))
-        return allowable[target].load()
 
-    parts, target = target.split(':') if ':' in target else (target, None)
-    module = __import__(parts)
+        obj = _objects[key] = allowable[target].load()
+        return obj
 
-    for part in parts.split('.')[1:] + ([target] if target else []):
+    parts, name = target.split(':') if ':' in target else (target, None)
+    obj = _resolve(__import__(parts), parts, [name] if name else [])
+
+    _objects[key] = obj
+    return obj
+
+
+def _resolve(module, parts, names):
+    for part in parts.split('.')[1:] + names:
         module = getattr(module, part)
 
     return module
 
 
+def load_objects(targets, namespace=None):
+    """Load several objects at once, returning them as a list in the order requested.
+
+    Accepts the same references as :func:`load_object`.  Previously resolved
+    objects are returned from the cache; the remainder are grouped by module so
+    that each module is imported and traversed only once.
+    """
+
+    results = [_objects.get((namespace, target) if namespace and ':' not in target else target, NoDefault) for target in targets]
+    modules = defaultdict(list)
+
+    for i, target in enumerate(targets):
+        if results[i] is not NoDefault:
+            continue
+
+        if namespace and ':' not in target:
+            results[i] = load_object(target, namespace)
+            continue
+
+        parts, name = target.split(':') if ':' in target else (target, None)
+        modules[parts].append((i, target, name))
+
+    for parts, wanted in modules.items():
+        module = _resolve(__import__(parts), parts, [])
+
+        for i, target, name in wanted:
+            results[i] = _objects[target] = getattr(module, name) if name else module
+
+    return results
+
+
+def invalidate_object(target=None, namespace=None):
+    """Forget previously resolved objects.
+
+    With no arguments all resolved objects and the entry point index are
+    discarded.  Given a target only that reference is forgotten; given only a
+    namespace, the entry point index and every plugin loaded from that
+    namespace are.
+    """
+
+    if target is None and namespace is None:
+        _objects.clear()
+        _plugins.clear()
+        return
+
+    if target is None:
+        _plugins.clear()
+
+        for key in [key for key in _objects if isinstance(key, tuple) and key[0] == namespace]:
+            del _objects[key]
+
+        return
+
+    _objects.pop((namespace, target) if namespace and ':' not in target else target, None)
+
+
 class PluginCache(defaultdict):
     """Lazily load plugins from the given namespace."""
 
@@ -123,116 +676,1159 @@ class Cache(dict):
 
         http://genshi.edgewall.org/browser/trunk/genshi/util.py
 
+    Elements are kept in a circular doubly-linked list closed by a sentinel
+    element; the sentinel's ``next`` is the most recently used element and its
+    ``previous`` the least.  Because the ring is never empty, promotion and
+    eviction are branch-free constant-time pointer swaps.  Elements use
+    ``__slots__`` to avoid allocating an instance dictionary per entry.
+
+    Iteration, ``keys()``, ``values()``, and ``items()`` proceed from most to
+    least recently used.  Reading a value (by subscript or ``get``) counts as a
+    reference; membership tests do not.
+
+    If a ``weight`` callable is given it is passed each value as it is stored
+    and must return the cost of that entry, e.g. its size in bytes; capacity
+    then bounds the total cost (available as ``size``) rather than the number
+    of entries.  A single entry costing more than the capacity is not stored,
+    and replaces (removes) any existing entry for its key without affecting
+    the others.
+
+    If ``ttl`` is given entries expire that many seconds after they were last
+    assigned; use :meth:`set` to override this per entry.  Expired entries are
+    discarded when next accessed and still count towards ``len()`` and
+    ``size`` until then; call :meth:`reap` (or use a :class:`CacheReaper`) to
+    discard them eagerly.
+
     Warning: If memory cleanup is diabled this dictionary will leak.
 
     """
 
     class CacheElement(object):
-        def __init__(self, key, value):
+        __slots__ = ('previous', 'next', 'key', 'value', 'cost', 'expires')
+
+        def __init__(self, key, value, cost=1, expires=None):
             self.previous = self.next = None
             self.key, self.value = key, value
+            self.cost, self.expires = cost, expires
 
         def __repr__(self):
             return repr(self.value)
 
-    def __init__(self, capacity):
+    clock = staticmethod(getattr(time, 'monotonic', time.time))
+
+    _find = dict.get
+    _store = dict.__setitem__
+    _discard = dict.__delitem__
+
+    def __init__(self, capacity, ttl=None, weight=None):
         super(Cache, self).__init__()
 
-        self.head = self.tail = None
-        self.capacity = capacity
+        self._root = root = self.CacheElement(None, None, 0)
+        root.previous = root.next = root
+        self._capacity = capacity
+        self._size = 0
+        self.ttl = ttl
+        self.weight = weight
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @capacity.setter
+    def capacity(self, value):
+        self._capacity = value
+        self._restrict()
+
+    @property
+    def size(self):
+        """The total cost of all entries; the entry count unless a weight function is in use."""
+        return self._size
+
+    def _elements(self):
+        """Iterate elements from most to least valuable; the current element may be unlinked while iterating."""
+
+        root = self._root
+        cur = root.next
+
+        while cur is not root:
+            element, cur = cur, cur.next
+            yield element
+
+    def _victim(self):
+        """Return the element next in line for eviction, or None if empty."""
+
+        element = self._root.previous
+        return None if element is self._root else element
 
     def __iter__(self):
-        cur = self.head
+        for element in self._elements():
+            yield element.key
 
-        while cur:
-            yield cur.key
-            cur = cur.next
+    def __contains__(self, key):
+        element = self._find(key)
+
+        if element is None:
+            return False
+
+        return element.expires is None or element.expires > self.clock()
 
     def __getitem__(self, key):
-        element = super(Cache, self).__getitem__(key)
-        self._update(element)
+        element = dict.__getitem__(self, key)
+
+        if element.expires is not None and element.expires <= self.clock():
+            self._remove(element)
+            raise KeyError(key)
+
+        # Unlink the element and relink it immediately after the sentinel.
+        previous, next = element.previous, element.next
+        previous.next, next.previous = next, previous
+
+        root = self._root
+        first = root.next
+        element.previous, element.next = root, first
+        first.previous = root.next = element
+
         return element.value
 
     def __setitem__(self, key, value):
-        try:
-            element = super(Cache, self).__getitem__(key)
-            element.value = value
-            self._update(element)
+        self.set(key, value)
 
-        except KeyError:
-            # Item doesn't exist, create a new wrapper element.
-            element = self.CacheElement(key, value)
-            super(Cache, self).__setitem__(key, element)
-            self._insert(element)
+    def set(self, key, value, ttl=NoDefault):
+        """Store a value, optionally overriding the default time-to-live.
 
-        self._restrict()
+        A ``ttl`` of None stores the value without expiry.
+        """
 
-    def _insert(self, element):
-        element.previous, element.next = None, self.head
+        if ttl is NoDefault:
+            ttl = self.ttl
 
-        if self.head is not None:
-            self.head.previous = element
+        expires = None if ttl is None else self.clock() + ttl
+        cost = 1 if self.weight is None else self.weight(value)
 
-        else:
-            self.tail = element
+        if cost > self._capacity:
+            # Storing it would only evict every other entry before discarding it, too.
+            self.pop(key, None)
+            return
 
-        self.head = element
+        element = self._find(key)
 
-    def _restrict(self):
-        while len(self) > self.capacity:
-            # element = super(Cache, self).get(self.tail.key)
-            del self[self.tail.key]
+        if element is not None:
+            self._size += cost - element.cost
+            element.value, element.cost, element.expires = value, cost, expires
 
-            if self.tail != self.head:
-                self.tail = self.tail.previous
-                self.tail.next = None
+            previous, next = element.previous, element.next
+            previous.next, next.previous = next, previous
 
-            else:
-                self.head = self.tail = None
+        else:
+            # Item doesn't exist, create a new wrapper element.
+            element = self.CacheElement(key, value, cost, expires)
+            self._store(key, element)
+            self._size += cost
 
-    def _update(self, element):
-        if self.head == element:
-            return
+        root = self._root
+        first = root.next
+        element.previous, element.next = root, first
+        first.previous = root.next = element
 
-        previous = element.previous
-        previous.next = element.next
+        if self._size > self._capacity:
+            self._restrict()
 
-        if element.next is not None:
-            element.next.previous = previous
+    def __delitem__(self, key):
+        self._unlink(dict.pop(self, key))
 
-        else:
-            self.tail = previous
+    def _unlink(self, element):
+        previous, next = element.previous, element.next
+        previous.next, next.previous = next, previous
+        element.previous = element.next = None
+        self._size -= element.cost
 
-        element.previous, element.next = None, self.head
-        self.head.previous = self.head = element
+    def _remove(self, element):
+        self._discard(element.key)
+        self._unlink(element)
 
+    def _restrict(self):
+        root = self._root
+        discard = self._discard
 
-class LoggingFile(object):
-    """A write-only file-like object that redirects to the standard Python logging module."""
+        while self._size > self._capacity:
+            element = root.previous
+            previous = element.previous
+            previous.next, root.previous = root, previous
+            self._size -= element.cost
+            discard(element.key)
 
-    def __init__(self, logger=None, level=logging.ERROR):
-        logger = logger if logger else logging.getLogger('logfile')
-        self.logger = partial(logger.log, level)
+    def reap(self):
+        """Discard all expired entries, returning the number removed."""
 
-    def write(self, text):
-        self.logger(text)
+        now = self.clock()
+        count = 0
 
-    def writelines(self, lines):
-        for line in lines:
-            self.logger(line)
+        for element in self._elements():
+            if element.expires is not None and element.expires <= now:
+                self._remove(element)
+                count += 1
 
-    def close(self, *args, **kw):
-        """A no-op method used for several of the file-like object methods."""
-        pass
+        return count
 
-    def next(self, *args, **kw):
-        """An error-raising exception usedbfor several of the methods."""
-        raise IOError("Logging files can not be read.")
+    def get(self, key, default=None):
+        try:
+            return self[key]
 
-    flush = close
-    read = next
-    readline = next
-    readlines = next
+        except KeyError:
+            return default
+
+    def setdefault(self, key, default=None):
+        try:
+            return self[key]
+
+        except KeyError:
+            self[key] = default
+            return default
+
+    def get_or_load(self, key, loader, ttl=NoDefault):
+        """Return the cached value, calling ``loader(key)`` to produce and store it if missing."""
+
+        try:
+            return self[key]
+
+        except KeyError:
+            value = loader(key)
+            self.set(key, value, ttl)
+            return value
+
+    def pop(self, key, default=NoDefault):
+        try:
+            element = dict.pop(self, key)
+
+        except KeyError:
+            element = None
+
+        else:
+            self._unlink(element)
+
+            if element.expires is not None and element.expires <= self.clock():
+                element = None
+
+        if element is None:
+            if default is NoDefault:
+                raise KeyError(key)
+
+            return default
+
+        return element.value
+
+    def popitem(self):
+        """Remove and return the least recently used (key, value) pair."""
+
+        element = self._victim()
+
+        if element is None:
+            raise KeyError("popitem(): cache is empty")
+
+        self._remove(element)
+        return element.key, element.value
+
+    def update(self, *args, **kw):
+        for key, value in dict(*args, **kw).items():
+            self[key] = value
+
+    def clear(self):
+        super(Cache, self).clear()
+
+        root = self._root
+        root.previous = root.next = root
+        self._size = 0
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return [element.value for element in self._elements()]
+
+    def items(self):
+        return [(element.key, element.value) for element in self._elements()]
+
+
+class FrequencySketch(object):
+    """An approximate, aging popularity counter for TinyLFU cache admission.
+
+    A count-min sketch of four rows of saturating counters (0-15) indexed by
+    multiplicative hashing.  After a number of increments proportional to the
+    capacity all counters are halved, so the estimate tracks recent rather
+    than all-time popularity.
+
+    The capacity is the number of distinct keys expected to be tracked, and
+    is limited to ``LIMIT``; each row holds two to four one-byte counters per
+    key.
+    """
+
+    SEEDS = (0x97cb3127, 0xb492b66f, 0x9ae16a3b, 0xc3a5c85d)
+    HALVE = bytes(bytearray(i >> 1 for i in range(256)))
+    LIMIT = 1 << 20
+
+    def __init__(self, capacity):
+        capacity = min(int(capacity), self.LIMIT)
+        bits = max(2 * capacity, 16).bit_length()
+
+        self._shift = 32 - min(bits, 32)
+        self._rows = [bytearray(1 << (32 - self._shift)) for seed in self.SEEDS]
+        self._sample = 10 * max(capacity, 1)
+        self._additions = 0
+
+    def increment(self, key):
+        value = hash(key) & 0xffffffff
+        shift = self._shift
+
+        for row, seed in zip(self._rows, self.SEEDS):
+            i = ((value * seed) & 0xffffffff) >> shift
+
+            if row[i] < 15:
+                row[i] += 1
+
+        self._additions += 1
+
+        if self._additions >= self._sample:
+            self._age()
+
+    def estimate(self, key):
+        value = hash(key) & 0xffffffff
+        shift = self._shift
+
+        return min(row[((value * seed) & 0xffffffff) >> shift] for row, seed in zip(self._rows, self.SEEDS))
+
+    def _age(self):
+        for row in self._rows:
+            row[:] = row.translate(self.HALVE)
+
+        self._additions //= 2
+
+
+class SegmentedCache(Cache):
+    """A scan-resistant segmented least-recently-used (SLRU) cache.
+
+    New entries are admitted to a probationary segment and promoted to a
+    protected segment when referenced again.  The protected segment is limited
+    to the ``protected`` fraction of the capacity; when it overflows its least
+    recently used entries are demoted back to probation.  Eviction always
+    takes from probation first, so a one-off scan over many keys displaces
+    other probationary entries rather than the established working set.
+
+    If ``admission`` is enabled a :class:`FrequencySketch` of recent key
+    references acts as a TinyLFU admission filter: once the cache is full a
+    new key is only stored if it has been referenced more often than the entry
+    it would displace.  Rejected assignments are silently dropped.  The sketch
+    is sized for ``entries`` keys, by default the capacity; pass the expected
+    number of entries when using a ``weight`` function, as the capacity is
+    then a total cost, such as a size in bytes, not a count.
+
+    Supports the same interface and options as :class:`Cache`.  Iteration runs
+    through the protected segment and then the probationary one, each from
+    most to least recently used.
+    """
+
+    class CacheElement(Cache.CacheElement):
+        __slots__ = ('protected', )
+
+        def __init__(self, key, value, cost=1, expires=None):
+            self.previous = self.next = None
+            self.key, self.value = key, value
+            self.cost, self.expires = cost, expires
+            self.protected = False
+
+    def __init__(self, capacity, ttl=None, weight=None, protected=0.8, admission=False, entries=None):
+        super(SegmentedCache, self).__init__(capacity, ttl, weight)
+
+        self._protected = root = self.CacheElement(None, None, 0)
+        root.previous = root.next = root
+        self._protected_size = 0
+        self.protected = protected
+        self.sketch = FrequencySketch(capacity if entries is None else entries) if admission else None
+
+    def _elements(self):
+        for root in (self._protected, self._root):
+            cur = root.next
+
+            while cur is not root:
+                element, cur = cur, cur.next
+                yield element
+
+    def _victim(self):
+        for root in (self._root, self._protected):
+            if root.previous is not root:
+                return root.previous
+
+        return None
+
+    def _touch(self, element):
+        """Move a referenced element to the head of the protected segment, demoting any overflow."""
+
+        previous, next = element.previous, element.next
+        previous.next, next.previous = next, previous
+
+        if not element.protected:
+            element.protected = True
+            self._protected_size += element.cost
+
+        root = self._protected
+        first = root.next
+        element.previous, element.next = root, first
+        first.previous = root.next = element
+
+        limit = self._capacity * self.protected
+        probation = self._root
+
+        while self._protected_size > limit:
+            demoted = root.previous
+            previous = demoted.previous
+            previous.next, root.previous = root, previous
+
+            demoted.protected = False
+            self._protected_size -= demoted.cost
+
+            first = probation.next
+            demoted.previous, demoted.next = probation, first
+            first.previous = probation.next = demoted
+
+    def __getitem__(self, key):
+        if self.sketch is not None:
+            self.sketch.increment(key)
+
+        element = dict.__getitem__(self, key)
+
+        if element.expires is not None and element.expires <= self.clock():
+            self._remove(element)
+            raise KeyError(key)
+
+        self._touch(element)
+        return element.value
+
+    def set(self, key, value, ttl=NoDefault):
+        if ttl is NoDefault:
+            ttl = self.ttl
+
+        expires = None if ttl is None else self.clock() + ttl
+        cost = 1 if self.weight is None else self.weight(value)
+
+        if cost > self._capacity:
+            self.pop(key, None)
+            return
+
+        sketch = self.sketch
+        element = self._find(key)
+
+        if sketch is not None:
+            sketch.increment(key)
+
+        if element is not None:
+            if element.protected:
+                self._protected_size += cost - element.cost
+
+            self._size += cost - element.cost
+            element.value, element.cost, element.expires = value, cost, expires
+            self._touch(element)
+
+        else:
+            if sketch is not None and self._size + cost > self._capacity:
+                victim = self._victim()
+
+                if victim is not None and sketch.estimate(key) <= sketch.estimate(victim.key):
+                    return
+
+            element = self.CacheElement(key, value, cost, expires)
+            self._store(key, element)
+            self._size += cost
+
+            root = self._root
+            first = root.next
+            element.previous, element.next = root, first
+            first.previous = root.next = element
+
+        if self._size > self._capacity:
+            self._restrict()
+
+    def _unlink(self, element):
+        if element.protected:
+            self._protected_size -= element.cost
+            element.protected = False
+
+        super(SegmentedCache, self)._unlink(element)
+
+    def _restrict(self):
+        while self._size > self._capacity:
+            self._remove(self._victim())
+
+    def clear(self):
+        super(SegmentedCache, self).clear()
+
+        root = self._protected
+        root.previous = root.next = root
+        self._protected_size = 0
+
+
+class CacheReaper(threading.Thread):
+    """A daemon thread which periodically discards expired entries from a cache.
+
+    Only a weak reference to the cache is held; the thread exits once the cache
+    has been garbage collected or :meth:`stop` is called.  The cache will be
+    modified from this thread, so use it with a :class:`ConcurrentCache`, not a
+    bare :class:`Cache`.
+    """
+
+    def __init__(self, cache, interval):
+        super(CacheReaper, self).__init__(name="CacheReaper")
+
+        self.daemon = True
+        self.cache = weakref.ref(cache)
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            cache = self.cache()
+
+            if cache is None:
+                break
+
+            cache.reap()
+            del cache
+
+    def stop(self):
+        self._stopped.set()
+
+
+class ConcurrentCache(object):
+    """A thread-safe least-recently-used (LRU) cache.
+
+    Keys are distributed by hash across a number of independent :class:`Cache`
+    shards, each guarded by its own lock, so threads operating on different
+    keys rarely contend.  The total capacity is divided as evenly as possible
+    between the shards, their capacities summing to it exactly; there are
+    never more shards than the capacity, so every shard holds at least one
+    entry.  Recency is tracked per shard, so eviction is LRU within a shard
+    and approximately LRU overall.
+
+    Supports the same mapping interface as :class:`Cache`.  Iteration and the
+    ``keys()``, ``values()``, and ``items()`` methods return snapshots taken
+    one shard at a time.  Additional keyword arguments, such as ``ttl`` and
+    ``weight``, are passed through to each shard.
+    """
+
+    def __init__(self, capacity, shards=16, factory=Cache, **options):
+        if shards < 1:
+            raise ValueError("At least one shard is required.")
+
+        shards = max(min(shards, int(capacity)), 1)
+
+        self._count = shards
+        self._capacity = capacity
+        self._shards = [(threading.Lock(), factory(share, **options)) for share in self._share(capacity, shards)]
+        self._pending = [dict() for i in range(shards)]
+
+    @staticmethod
+    def _share(capacity, shards):
+        """Divide the capacity between the shards, exactly.
+
+        The first shards each receive one more until the remainder is used.
+        """
+
+        share, remainder = divmod(capacity, shards)
+        return [share + 1] * remainder + [share] * (shards - remainder)
+
+    def _shard(self, key):
+        return self._shards[hash(key) % self._count]
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @capacity.setter
+    def capacity(self, value):
+        if value < self._count:
+            raise ValueError("Capacity can not be reduced below the number of shards ({0}).".format(self._count))
+
+        self._capacity = value
+
+        for (lock, shard), share in zip(self._shards, self._share(value, self._count)):
+            with lock:
+                shard.capacity = share
+
+    @property
+    def size(self):
+        return sum(shard.size for lock, shard in self._shards)
+
+    def __len__(self):
+        return sum(len(shard) for lock, shard in self._shards)
+
+    def __contains__(self, key):
+        lock, shard = self._shard(key)
+
+        with lock:
+            return key in shard
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __getitem__(self, key):
+        lock, shard = self._shards[hash(key) % self._count]
+
+        with lock:
+            return shard[key]
+
+    def __setitem__(self, key, value):
+        lock, shard = self._shards[hash(key) % self._count]
+
+        with lock:
+            shard[key] = value
+
+    def __delitem__(self, key):
+        lock, shard = self._shard(key)
+
+        with lock:
+            del shard[key]
+
+    def set(self, key, value, ttl=NoDefault):
+        lock, shard = self._shard(key)
+
+        with lock:
+            shard.set(key, value, ttl)
+
+    def _claim(self, key):
+        """Look up a key, registering an in-flight load if it is missing.
+
+        Returns a tuple of (value, future, leader).  If the value was found the
+        future is None.  Otherwise the caller either leads the load, and must
+        eventually call :meth:`_settle`, or waits on the returned future.
+        """
+
+        index = hash(key) % self._count
+        lock, shard = self._shards[index]
+        pending = self._pending[index]
+
+        with lock:
+            try:
+                return shard[key], None, False
+
+            except KeyError:
+                pass
+
+            future = pending.get(key)
+
+            if future is not None:
+                return None, future, False
+
+            from concurrent.futures import Future
+
+            future = pending[key] = Future()
+            return None, future, True
+
+    def _settle(self, key, future, value=NoDefault, exception=None, ttl=NoDefault):
+        index = hash(key) % self._count
+        lock, shard = self._shards[index]
+
+        with lock:
+            if value is not NoDefault:
+                shard.set(key, value, ttl)
+
+            del self._pending[index][key]
+
+        if value is not NoDefault:
+            future.set_result(value)
+
+        elif exception is None:
+            future.cancel()
+
+        else:
+            future.set_exception(exception)
+
+    def get_or_load(self, key, loader, ttl=NoDefault):
+        """Return the cached value, calling ``loader(key)`` to produce and store it if missing.
+
+        Concurrent requests for the same missing key are coalesced: only one
+        thread calls the loader while the others wait on a shared
+        :class:`concurrent.futures.Future` for its result.  Exceptions raised by
+        the loader are propagated to every waiting caller and are not cached.
+        """
+
+        value, future, leader = self._claim(key)
+
+        if future is None:
+            return value
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = loader(key)
+
+        except BaseException as exception:
+            self._settle(key, future, exception=exception)
+            raise
+
+        self._settle(key, future, value, ttl=ttl)
+        return value
+
+    def get_or_load_async(self, key, loader, ttl=NoDefault):
+        """Return an awaitable for the cached value, loading it using a coroutine if missing.
+
+        The asyncio equivalent of :meth:`get_or_load`; ``loader(key)`` must
+        return an awaitable.  Loads are coalesced with concurrent synchronous
+        and asynchronous callers alike.  Must be called from within a running
+        event loop.
+        """
+
+        import asyncio
+
+        value, future, leader = self._claim(key)
+
+        if future is None:
+            result = asyncio.get_event_loop().create_future()
+            result.set_result(value)
+            return result
+
+        if leader:
+            def settle(task):
+                if task.cancelled():
+                    self._settle(key, future)
+
+                elif task.exception() is not None:
+                    self._settle(key, future, exception=task.exception())
+
+                else:
+                    self._settle(key, future, task.result(), ttl=ttl)
+
+            try:
+                task = asyncio.ensure_future(loader(key))
+
+            except BaseException as exception:
+                self._settle(key, future, exception=exception)
+                raise
+
+            task.add_done_callback(settle)
+
+        return asyncio.wrap_future(future)
+
+    def reap(self):
+        count = 0
+
+        for lock, shard in self._shards:
+            with lock:
+                count += shard.reap()
+
+        return count
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, dict(self.items()))
+
+    def get(self, key, default=None):
+        lock, shard = self._shards[hash(key) % self._count]
+
+        with lock:
+            return shard.get(key, default)
+
+    def setdefault(self, key, default=None):
+        lock, shard = self._shard(key)
+
+        with lock:
+            return shard.setdefault(key, default)
+
+    def pop(self, key, default=NoDefault):
+        lock, shard = self._shard(key)
+
+        with lock:
+            return shard.pop(key, default)
+
+    def update(self, *args, **kw):
+        for key, value in dict(*args, **kw).items():
+            self[key] = value
+
+    def clear(self):
+        for lock, shard in self._shards:
+            with lock:
+                shard.clear()
+
+    def keys(self):
+        return [key for key, value in self.items()]
+
+    def values(self):
+        return [value for key, value in self.items()]
+
+    def items(self):
+        result = []
+
+        for lock, shard in self._shards:
+            with lock:
+                result.extend(shard.items())
+
+        return result
+
+
+_KEYWORD_MARKER = object()
+_ATOMIC_KEYS = frozenset((int, float, str, binary, unicode, type(None)))
+
+
+def _make_key(*args, **kw):
+    """Build a cache key from call arguments.
+
+    A single positional argument of a common scalar type is its own key;
+    anything else becomes a tuple of the positional arguments followed by the
+    sorted keyword arguments.
+    """
+
+    if not kw:
+        if len(args) == 1 and type(args[0]) in _ATOMIC_KEYS:
+            return args[0]
+
+        return args
+
+    return args + (_KEYWORD_MARKER, ) + tuple(sorted(kw.items()))
+
+
+def _call_referent(fn, reference, *args, **kw):
+    instance = reference()
+
+    if instance is None:
+        raise ReferenceError("The instance this cached method was bound to no longer exists.")
+
+    return fn(instance, *args, **kw)
+
+
+class CachedFunction(object):
+    """A callable memoizing the results of another within a :class:`Cache`.
+
+    Usually created using the :func:`cached` decorator.  Results are keyed on
+    the call arguments, which must be hashable; exceptions are not cached.
+
+    The ``hits``, ``misses``, and ``evictions`` counters and :meth:`stats` are
+    intended for metrics collection.  The cache and counters are guarded by a
+    lock, so the function may be called from multiple threads; the lock is not
+    held while the decorated function runs, so concurrent misses on the same
+    key may each call it.
+
+    When used as a method each instance receives its own cache and counters,
+    created on first access and stored in the instance's ``__dict__``, or for
+    classes using ``__slots__`` in a weak-keyed dictionary on the decorated
+    function, requiring a ``__weakref__`` slot.  The instance is never part of
+    a cache key and is only weakly referenced, so it is freed as soon as it
+    is no longer used.
+    """
+
+    def __init__(self, fn, capacity=128, ttl=None, key=None):
+        update_wrapper(self, fn)
+
+        self.capacity = capacity
+        self.ttl = ttl
+        self.key = key if key else _make_key
+        self.cache = Cache(capacity, ttl)
+        self.hits = self.misses = self.evictions = 0
+        self._lock = threading.Lock()
+        self._function = fn
+        self._attribute = getattr(fn, '__name__', None)
+        self._instances = weakref.WeakKeyDictionary()
+
+    def __set_name__(self, owner, name):
+        self._attribute = name
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+
+        try:
+            return self._instances[instance]
+
+        except (KeyError, TypeError):
+            pass
+
+        try:
+            function = partial(_call_referent, self._function, weakref.ref(instance))
+
+        except TypeError:  # Not weakly referenceable; the instance and its cache will form a reference cycle.
+            function = partial(self._function, instance)
+
+        bound = self.__class__(function, self.capacity, self.ttl, self.key)
+        update_wrapper(bound, self._function)
+
+        try:
+            instance.__dict__[self._attribute] = bound  # Found before this descriptor by later lookups.
+
+        except AttributeError:
+            self._instances[instance] = bound
+
+        return bound
+
+    def __call__(self, *args, **kw):
+        key = self.key(*args, **kw)
+        cache = self.cache
+
+        with self._lock:
+            try:
+                value = cache[key]
+
+            except KeyError:
+                self.misses += 1
+
+            else:
+                self.hits += 1
+                return value
+
+        value = self._function(*args, **kw)
+
+        with self._lock:
+            count = len(cache) - dict.__contains__(cache, key)  # Another thread may have stored it meanwhile.
+            cache[key] = value
+            self.evictions += count + 1 - len(cache)
+
+        return value
+
+    def stats(self):
+        """Return a dictionary of counters describing cache usage."""
+
+        with self._lock:
+            return dict(
+                    hits = self.hits,
+                    misses = self.misses,
+                    evictions = self.evictions,
+                    size = len(self.cache),
+                    capacity = self.capacity
+                )
+
+    def clear(self):
+        """Empty the cache and reset the counters."""
+
+        with self._lock:
+            self.cache.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+def cached(capacity=128, ttl=None, key=None):
+    """Memoize the decorated function or method using a :class:`Cache`.
+
+    For example:
+
+        @cached(capacity=1024, ttl=60)
+        def lookup(name):
+            ...
+
+    :param capacity: the maximum number of results to retain
+    :param ttl: if given, the number of seconds after which a result expires
+    :param key: a callable accepting the call arguments and returning a hashable
+                cache key; by default the arguments themselves are used
+
+    The result is a :class:`CachedFunction`.
+    """
+
+    def decorator(fn):
+        return CachedFunction(fn, capacity, ttl, key)
+
+    return decorator
+
+
+_LoggingListener = None
+
+
+def _logging_listener():
+    """Return the listener thread class of buffered logging files, defined on first use."""
+
+    global _LoggingListener
+
+    if _LoggingListener is not None:
+        return _LoggingListener
+
+    from logging.handlers import QueueListener
+
+    try:
+        from queue import Empty
+    except ImportError: # pragma: no cover
+        from Queue import Empty
+
+    class LoggingListener(QueueListener):
+        def __init__(self, queue, handler, file):
+            super(LoggingListener, self).__init__(queue, handler)
+            self.file = file
+
+        def dequeue(self, block):
+            """Wait for the next record, logging incomplete lines of the file as they expire."""
+
+            if not block:
+                return self.queue.get(False)
+
+            timeout = self.file.interval or None
+
+            while True:
+                try:
+                    return self.queue.get(True, timeout)
+
+                except Empty:
+                    timeout = self.file._expire()
+
+    _LoggingListener = LoggingListener
+    return LoggingListener
+
+
+class LoggingFile(object):
+    """A write-only file-like object that redirects to the standard Python logging module.
+
+    By default every write is logged immediately, on the writing thread.  In
+    buffered mode partial writes are assembled into lines, each complete line
+    becoming one record, and records are handed through a
+    :class:`logging.handlers.QueueHandler` to a
+    :class:`logging.handlers.QueueListener` thread which runs the logger's
+    handlers, so writers never wait on handler I/O.  An incomplete line is
+    logged once it reaches ``size`` characters, once it is ``interval``
+    seconds old, or on :meth:`flush`; the age of an incomplete line is
+    checked by each write and by the listener thread while it is idle, so a
+    line left without a newline, such as a progress message, is still logged
+    promptly.
+
+    Buffered files must be closed to stop the listener thread; closing waits
+    for queued records to be handled, and subsequent writes are logged
+    immediately.
+
+    Byte strings are decoded, as UTF-8 where possible, before being logged.
+    """
+
+    clock = staticmethod(getattr(time, 'monotonic', time.time))
+
+    def __init__(self, logger=None, level=logging.ERROR, buffered=False, size=8192, interval=1.0):
+        logger = logger if logger else logging.getLogger('logfile')
+        self.logger = partial(logger.log, level)
+        self.buffered = buffered
+
+        if not buffered:
+            return
+
+        from logging.handlers import QueueHandler
+
+        try:
+            from queue import SimpleQueue as Queue
+        except ImportError: # pragma: no cover
+            from Queue import Queue
+
+        self.size = size
+        self.interval = interval
+
+        self._target = logger
+        self._level = level
+        self._lock = threading.Lock()
+        self._partial = []
+        self._length = 0
+        self._started = None
+
+        queue = Queue()
+        self._handler = QueueHandler(queue)
+        self._listener = _logging_listener()(queue, logger, self)  # Loggers quack like handlers; this runs logger.handle().
+        self._listener.start()
+
+    def _expire(self):
+        """Log an incomplete line at least ``interval`` seconds old, returning the time until the next check."""
+
+        with self._lock:
+            if not self.buffered or self._started is None:
+                return self.interval
+
+            age = self.clock() - self._started
+
+            if age < self.interval:
+                return self.interval - age
+
+            self._emit((self._take(), ))
+
+        return self.interval
+
+    def _emit(self, lines):
+        logger, level = self._target, self._level
+
+        if not logger.isEnabledFor(level):
+            return
+
+        record, enqueue, name = logger.makeRecord, self._handler.enqueue, logger.name
+
+        for line in lines:
+            enqueue(record(name, level, "(unknown file)", 0, line, (), None))
+
+    def _take(self, tail=''):
+        line = ''.join(self._partial) + tail
+        self._partial, self._length, self._started = [], 0, None
+        return line
+
+    def write(self, text):
+        text = native(text)
+
+        if not self.buffered:
+            self.logger(text)
+            return
+
+        with self._lock:
+            if not self.buffered:  # Closed while waiting for the lock.
+                self.logger(text)
+                return
+
+            if '\n' in text:
+                lines = text.split('\n')
+                remainder = lines.pop()
+                lines[0] = self._take(lines[0])
+
+                if remainder:
+                    self._partial.append(remainder)
+                    self._length, self._started = len(remainder), self.clock()
+
+                self._emit(lines)
+                return
+
+            if not text:
+                return
+
+            now = self.clock()
+
+            if self._started is None:
+                self._started = now
+
+            self._partial.append(text)
+            self._length += len(text)
+
+            if self._length >= self.size or now - self._started >= self.interval:
+                self._emit((self._take(), ))
+
+    def writelines(self, lines):
+        if self.buffered:
+            for line in lines:
+                self.write(line)
+
+            return
+
+        for line in lines:
+            self.logger(native(line))
+
+    def flush(self):
+        """Log any incomplete line; a no-op unless buffered."""
+
+        if not self.buffered:
+            return
+
+        with self._lock:
+            if self._partial:
+                self._emit((self._take(), ))
+
+    def close(self, *args, **kw):
+        """Flush and stop the listener thread, waiting for queued records; a no-op unless buffered."""
+
+        if not self.buffered:
+            return
+
+        with self._lock:
+            if self._partial:
+                self._emit((self._take(), ))
+
+            self.buffered = False
+
+        self._listener.stop()
+
+    def next(self, *args, **kw):
+        """An error-raising exception usedbfor several of the methods."""
+        raise IOError("Logging files can not be read.")
+
+    read = next
+    readline = next
+    readlines = next
 
 
 class CounterMeta(type):
@@ -240,16 +1836,54 @@ class CounterMeta(type):
     A simple meta class which adds a ``_counter`` attribute to the instances of
     the classes it is used on. This counter is simply incremented for each new
     instance.
+
+    Values are drawn from a single :func:`itertools.count`, whose increment is
+    atomic, so they are unique and increasing across threads without locking.
     '''
-    counter = 0
+    counter = count()
 
     def __call__(self, *args, **kwargs):
         instance = type.__call__(self, *args, **kwargs)
-        instance._counter = CounterMeta.counter
-        CounterMeta.counter += 1
+        instance._counter = next(CounterMeta.counter)
         return instance
 
 
+# Separate caches for callables and for methods bound to an instance, keyed on the underlying function.
+_argspecs = (weakref.WeakKeyDictionary(), weakref.WeakKeyDictionary())
+_binders = (weakref.WeakKeyDictionary(), weakref.WeakKeyDictionary())
+
+
+def _callable_target(obj):
+    """Return the object to cache introspection against, and whether it is a bound method."""
+
+    if isinstance(obj, type):
+        return obj, 0
+
+    if hasattr(obj, '__func__') and getattr(obj, '__self__', None) is not None:
+        return obj.__func__, 1  # Bound methods are transient; key on the function.
+
+    if callable(obj):
+        return obj, 0
+
+    raise TypeError("Object not callable?")
+
+
+def _memoize(caches, obj, factory):
+    target, bound = _callable_target(obj)
+    cache = caches[bound]
+
+    try:
+        return cache[target]
+
+    except KeyError:
+        result = cache[target] = factory(target, bound)
+
+    except TypeError:  # Unhashable or not weakly referenceable.
+        result = factory(target, bound)
+
+    return result
+
+
 def getargspec(obj):
     """An improved inspect.getargspec.
 
@@ -259,53 +1893,143 @@ def getargspec(obj):
         required, optional, args, kwargs
         list, dict, bool, bool
 
-    Required is a list of required named arguments.
+    Required is a list of named arguments, in order, including those with defaults.
     Optional is a dictionary mapping optional arguments to defaults.
     Args and kwargs are True for the respective unlimited argument type.
+
+    Functions, bound methods, classes, ``functools.partial`` objects, and
+    callable instances are supported.  Results are cached against the
+    underlying function (or class, partial, or instance) for as long as it is
+    alive; callables which can not be weakly referenced are inspected anew on
+    every call.
     """
 
-    argnames, varargs, varkw, _defaults = None, None, None, None
+    required, optional, args, kwargs = _memoize(_argspecs, obj, _inspect_arguments)
 
-    if inspect.isfunction(obj) or inspect.ismethod(obj):
-        argnames, varargs, varkw, _defaults = inspect.getargspec(obj)
+    return list(required), dict(optional), args, kwargs
 
-    elif inspect.isclass(obj):
-        if inspect.ismethoddescriptor(obj.__init__):
-            argnames, varargs, varkw, _defaults = [], False, False, None
 
-        else:
-            argnames, varargs, varkw, _defaults = inspect.getargspec(obj.__init__)
+def compile_binder(obj):
+    """Return a function binding call arguments to the signature of a callable.
 
-    elif hasattr(obj, '__call__'):
-        argnames, varargs, varkw, _defaults = inspect.getargspec(obj.__call__)
+    The binder accepts positional and keyword arguments, such as the path
+    elements and parameters of a request, and returns an ``(args, kw)`` tuple
+    suitable for ``obj(*args, **kw)``.  Positional values are assigned to the
+    positional parameters in order, never to keyword-only ones; values for
+    positional-only parameters are returned in ``args`` and all others by
+    name.  Defaults are filled in, and unknown keyword arguments are passed
+    through only if the callable accepts ``**kw``.  A TypeError
+    naming the problem is raised for missing required arguments, unexpected
+    arguments, or arguments given more than once.
 
-    else:
-        raise TypeError("Object not callable?")
+    The signature is examined once; binders are cached per callable in the
+    same way as :func:`getargspec`.
+    """
 
-    # Need test case to prove this is even possible.
-    # if (argnames, varargs, varkw, defaults) is (None, None, None, None):
-    #     raise InspectionFailed()
+    return _memoize(_binders, obj, _compile_binder)
 
-    if argnames and argnames[0] == 'self':
-        del argnames[0]
 
-    if _defaults is None:
-        _defaults = []
-        defaults = dict()
+def _compile_binder(target, bound):
+    from inspect import Parameter
 
-    else:
-        # Create a mapping dictionary of defaults; this is slightly more useful.
-        defaults = dict()
-        _defaults = list(_defaults)
-        _defaults.reverse()
-        argnames.reverse()
-        for i, default in enumerate(_defaults):
-            defaults[argnames[i]] = default
-
-        argnames.reverse()
-        # del argnames[-len(_defaults):]
-
-    return argnames, defaults, True if varargs else False, True if varkw else False
+    parameters = _parameters(target, bound, False)
+    order = [parameter.name for parameter in parameters]
+    kinds = dict((parameter.name, parameter.kind) for parameter in parameters)
+    defaults = dict((parameter.name, parameter.default) for parameter in parameters if parameter.default is not parameter.empty)
+    varargs = Parameter.VAR_POSITIONAL in kinds.values()
+    varkw = Parameter.VAR_KEYWORD in kinds.values()
+
+    # Positional-only arguments are returned in args; all other named arguments are returned in kw.
+    positional = tuple(name for name in order if kinds[name] in (Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD))
+    leading = sum(1 for name in positional if kinds[name] == Parameter.POSITIONAL_ONLY)
+    prefix, named = positional[:leading], positional[leading:]
+    known = frozenset(name for name in order if kinds[name] in (Parameter.POSITIONAL_OR_KEYWORD, Parameter.KEYWORD_ONLY))
+    required = tuple(name for name in order if name in known and name not in defaults)
+    fill = tuple((name, defaults[name]) for name in order if name in known and name in defaults)
+    count = len(positional)
+
+    def binder(*args, **kw):
+        if len(args) > count and not varargs:
+            raise TypeError("Takes at most {0} positional arguments ({1} given).".format(count, len(args)))
+
+        if not varkw and not known.issuperset(kw):
+            raise TypeError("Got unexpected keyword arguments: {0}".format(", ".join(sorted(set(kw).difference(known)))))
+
+        head = args[:leading]
+
+        if len(head) < leading:
+            missing = [name for name in prefix[len(head):] if name not in defaults]
+
+            if missing:
+                raise TypeError("Missing required arguments: {0}".format(", ".join(missing)))
+
+            head += tuple(defaults[name] for name in prefix[len(head):])
+
+        for name, value in zip(named, args[leading:]):
+            if name in kw:
+                raise TypeError("Got multiple values for argument {0!r}.".format(name))
+
+            kw[name] = value
+
+        for name in required:
+            if name not in kw:
+                raise TypeError("Missing required arguments: {0}".format(", ".join(name for name in required if name not in kw)))
+
+        for name, value in fill:
+            if name not in kw:
+                kw[name] = value
+
+        if len(args) <= count:
+            return head, kw
+
+        # Surplus positional arguments only reach *args if the named arguments are passed positionally, too.
+        return args, dict((name, value) for name, value in kw.items() if kinds.get(name) != Parameter.POSITIONAL_OR_KEYWORD)
+
+    return binder
+
+
+def _parameters(obj, bound, strip=True):
+    """Return the inspect.Parameter instances of a callable's signature, excluding any bound instance."""
+
+    import inspect
+
+    if isinstance(obj, type):
+        if inspect.ismethoddescriptor(obj.__init__) or not inspect.isfunction(obj.__init__):
+            return []
+
+        obj, bound = obj.__init__, 1
+
+    elif not (inspect.isfunction(obj) or inspect.ismethod(obj) or inspect.isbuiltin(obj) or isinstance(obj, partial)):
+        obj, bound = obj.__call__, 0
+
+    parameters = list(inspect.signature(obj).parameters.values())
+
+    if bound:
+        del parameters[:1]
+
+    elif strip and parameters and parameters[0].name == 'self':
+        del parameters[0]
+
+    return parameters
+
+
+def _inspect_arguments(obj, bound):
+    required, optional, args, kwargs = [], {}, False, False
+
+    for parameter in _parameters(obj, bound):
+        if parameter.kind == parameter.VAR_POSITIONAL:
+            args = True
+
+        elif parameter.kind == parameter.VAR_KEYWORD:
+            kwargs = True
+
+        else:
+            required.append(parameter.name)
+
+            if parameter.default is not parameter.empty:
+                optional[parameter.name] = parameter.default
+
+    return tuple(required), optional, args, kwargs
 
 
 class RichComparisonMixin(object):
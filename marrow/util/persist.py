@@ -0,0 +1,314 @@
+# encoding: utf-8
+
+"""A persistent, on-disk cache tier."""
+
+import sqlite3
+import time
+
+try:
+    import cPickle as pickle
+except ImportError: # pragma: no cover
+    import pickle
+
+from marrow.util.object import Cache, NoDefault
+
+
+__all__ = ['DiskStore', 'TieredCache']
+
+
+
+def _dumps(value):
+    return sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+class DiskStore(object):
+    """A pickled key/value store held in an indexed SQLite database file.
+
+    Writes are batched: they are visible to this store immediately but only
+    committed to disk every ``batch`` writes or when :meth:`flush` or
+    :meth:`close` is called.  Each write is stamped with an increasing
+    sequence number so :meth:`restore` can reload the most recently written
+    entries first.  Expiry deadlines are stored as wall-clock times so they
+    survive restarts.
+
+    Keys are matched by their pickled form; see
+    :class:`marrow.util.shared.SharedCache` for the implications.
+    """
+
+    clock = staticmethod(time.time)
+
+    def __init__(self, path, batch=100):
+        self.path = path
+        self.batch = batch
+
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS cache (key BLOB PRIMARY KEY, value BLOB NOT NULL, expires REAL, sequence INTEGER NOT NULL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS cache_sequence ON cache (sequence)")
+        self._connection.commit()
+
+        self._sequence = self._connection.execute("SELECT COALESCE(MAX(sequence), 0) FROM cache").fetchone()[0]
+        self._pending = 0
+
+    def _written(self, count=1):
+        self._pending += count
+
+        if self._pending >= self.batch:
+            self.flush()
+
+    def flush(self):
+        """Commit any pending writes to disk."""
+
+        self._connection.commit()
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def __contains__(self, key):
+        row = self._connection.execute("SELECT expires FROM cache WHERE key = ?", (_dumps(key), )).fetchone()
+        return row is not None and (row[0] is None or row[0] > self.clock())
+
+    def _fetch(self, key, remove=False):
+        """Return the value and remaining time-to-live of a key, optionally removing it."""
+
+        raw = _dumps(key)
+        row = self._connection.execute("SELECT value, expires FROM cache WHERE key = ?", (raw, )).fetchone()
+
+        if row is None:
+            raise KeyError(key)
+
+        value, expires = row
+        ttl = None if expires is None else expires - self.clock()
+
+        if remove or (ttl is not None and ttl <= 0):
+            self._connection.execute("DELETE FROM cache WHERE key = ?", (raw, ))
+            self._written()
+
+        if ttl is not None and ttl <= 0:
+            raise KeyError(key)
+
+        return pickle.loads(bytes(value)), ttl
+
+    def __getitem__(self, key):
+        return self._fetch(key)[0]
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def set(self, key, value, ttl=None):
+        """Store a value, expiring after ``ttl`` seconds if given."""
+
+        self._sequence += 1
+        expires = None if ttl is None else self.clock() + ttl
+
+        self._connection.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                (_dumps(key), _dumps(value), expires, self._sequence))
+        self._written()
+
+    def __delitem__(self, key):
+        if not self._connection.execute("DELETE FROM cache WHERE key = ?", (_dumps(key), )).rowcount:
+            raise KeyError(key)
+
+        self._written()
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+
+        except KeyError:
+            return default
+
+    def pop(self, key, default=NoDefault):
+        try:
+            return self._fetch(key, True)[0]
+
+        except KeyError:
+            if default is NoDefault:
+                raise
+
+            return default
+
+    def clear(self):
+        self._connection.execute("DELETE FROM cache")
+        self.flush()
+
+    def keys(self):
+        """Return every stored key, including those which have expired but not yet been removed."""
+
+        return [pickle.loads(bytes(key)) for key, in self._connection.execute("SELECT key FROM cache")]
+
+    def items(self, limit=None):
+        """Return unexpired (key, value, ttl) triples, most recently written first."""
+
+        now = self.clock()
+        cursor = self._connection.execute("SELECT key, value, expires FROM cache WHERE expires IS NULL OR expires > ? "
+                "ORDER BY sequence DESC LIMIT ?", (now, -1 if limit is None else limit))
+
+        return [(pickle.loads(bytes(key)), pickle.loads(bytes(value)), None if expires is None else expires - now)
+                for key, value, expires in cursor]
+
+    def snapshot(self, cache):
+        """Write every entry of a :class:`marrow.util.object.Cache` to disk in one transaction.
+
+        Entries are written from least to most recently used so that
+        :meth:`restore` reproduces the cache's ordering.
+        """
+
+        now, clock = self.clock(), cache.clock()
+        rows = []
+
+        for element in reversed(list(cache._elements())):
+            if element.expires is not None and element.expires <= clock:
+                continue
+
+            self._sequence += 1
+            expires = None if element.expires is None else now + (element.expires - clock)
+            rows.append((_dumps(element.key), _dumps(element.value), expires, self._sequence))
+
+        self._connection.executemany("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)", rows)
+        self.flush()
+
+        return len(rows)
+
+    def restore(self, cache, limit=None):
+        """Load the most recently written entries into a cache, returning the number loaded.
+
+        At most ``limit`` entries are read, defaulting to the cache's capacity.
+        """
+
+        entries = self.items(cache.capacity if limit is None else limit)
+
+        for key, value, ttl in reversed(entries):
+            cache.set(key, value, ttl)
+
+        return len(entries)
+
+
+class TieredCache(Cache):
+    """A :class:`marrow.util.object.Cache` which spills evicted entries to a :class:`DiskStore`.
+
+    Lookups missing in memory fall through to the store; entries found there
+    are moved back into memory.  Deleting an entry removes it from both tiers.
+    Use :meth:`snapshot` before shutting down and :meth:`restore` on start to
+    warm the in-memory tier in bulk rather than by recomputation; restored
+    entries also remain on disk, so a crash afterwards does not start cold.
+
+    The keys held on disk are tracked in memory, loaded from the store once
+    on creation, so lookups and stores of keys which were never spilled do
+    not touch the disk.  The store must not be shared with other caches.
+    """
+
+    def __init__(self, capacity, store, ttl=None, weight=None):
+        super(TieredCache, self).__init__(capacity, ttl, weight)
+        self.store = store
+        self._spilled = set(store.keys())
+
+    def __contains__(self, key):
+        return super(TieredCache, self).__contains__(key) or (key in self._spilled and key in self.store)
+
+    def __getitem__(self, key):
+        try:
+            return super(TieredCache, self).__getitem__(key)
+
+        except KeyError:
+            if key not in self._spilled:
+                raise
+
+        self._spilled.discard(key)
+        value, ttl = self.store._fetch(key, True)
+        super(TieredCache, self).set(key, value, ttl)
+
+        return value
+
+    def set(self, key, value, ttl=NoDefault):
+        # Any copy on disk is now stale; it must not resurface once this one expires.
+        if key in self._spilled:
+            self._spilled.discard(key)
+            self.store.pop(key, None)
+
+        super(TieredCache, self).set(key, value, ttl)
+
+    def __delitem__(self, key):
+        spilled = key in self._spilled
+        self._spilled.discard(key)
+
+        try:
+            super(TieredCache, self).__delitem__(key)
+
+        except KeyError:
+            if not spilled:
+                raise
+
+            del self.store[key]
+            return
+
+        if spilled:
+            self.store.pop(key, None)
+
+    def pop(self, key, default=NoDefault):
+        missing = object()
+        value = super(TieredCache, self).pop(key, missing)
+
+        if key in self._spilled:
+            self._spilled.discard(key)
+            stored = self.store.pop(key, missing)
+
+            if value is missing:
+                value = stored
+
+        if value is missing:
+            if default is NoDefault:
+                raise KeyError(key)
+
+            return default
+
+        return value
+
+    def _restrict(self):
+        now = self.clock()
+
+        while self._size > self._capacity:
+            element = self._victim()
+            self._remove(element)
+
+            if element.expires is None:
+                self.store.set(element.key, element.value)
+
+            elif element.expires > now:
+                self.store.set(element.key, element.value, element.expires - now)
+
+            else:
+                continue
+
+            self._spilled.add(element.key)
+
+    def clear(self):
+        super(TieredCache, self).clear()
+        self.store.clear()
+        self._spilled.clear()
+
+    def snapshot(self):
+        """Persist the in-memory tier to the store."""
+
+        count = self.store.snapshot(self)
+        self._spilled.update(element.key for element in self._elements())
+
+        return count
+
+    def restore(self, limit=None):
+        """Warm the in-memory tier from the store, leaving the entries on disk.
+
+        At most ``limit`` entries are read, defaulting to the capacity.
+        """
+
+        entries = self.store.items(self.capacity if limit is None else limit)
+        store = super(TieredCache, self).set
+
+        for key, value, ttl in reversed(entries):
+            store(key, value, ttl)
+
+        return len(entries)
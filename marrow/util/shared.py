@@ -0,0 +1,423 @@
+# encoding: utf-8
+
+"""A cache shared between processes on a single host."""
+
+import mmap
+import multiprocessing
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+
+try:
+    import cPickle as pickle
+except ImportError: # pragma: no cover
+    import pickle
+
+try:
+    from multiprocessing import shared_memory
+except ImportError: # pragma: no cover
+    shared_memory = None
+
+try:
+    import fcntl
+except ImportError: # pragma: no cover
+    fcntl = None
+
+from marrow.util.object import NoDefault
+
+
+__all__ = ['SharedCache']
+
+
+# Named blocks created by this process (or inherited across a fork), which remain registered for cleanup.
+_created = set()
+
+
+def _attach(name, length):
+    """Attach to an existing named block without it being unlinked when this process exits."""
+
+    try:
+        return shared_memory.SharedMemory(name, False, length, track=False)
+
+    except TypeError:  # Python < 3.13 registers every attached block with the resource tracker.
+        pass
+
+    memory = shared_memory.SharedMemory(name, False, length)
+
+    if memory.name not in _created and getattr(shared_memory, '_USE_POSIX', False):
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(memory._name, 'shared_memory')
+
+    return memory
+
+
+class _FileLock(object):
+    """A lock held by at most one thread of any process opening the same path, using flock."""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread = threading.Lock()
+        self._open()
+
+    def _open(self):
+        self._pid = os.getpid()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    def __enter__(self):
+        self._thread.acquire()
+
+        if self._pid != os.getpid():  # Forked children must not share the parent's open file, nor its lock.
+            os.close(self._fd)
+            self._open()
+
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread.release()
+
+    def close(self):
+        os.close(self._fd)
+
+
+class SharedCache(object):
+    """A least-recently-used approximating cache stored in shared memory.
+
+    Entries are pickled into a fixed-size, set-associative hash table: each key
+    hashes to a bucket of ``ways`` slots of ``slot_size`` bytes, and when a
+    bucket is full the CLOCK algorithm evicts a slot not referenced since the
+    hand last passed it.  Every process using the table sees the same entries,
+    so pre-forked workers hold one copy of each cached value rather than one
+    copy per worker.
+
+    By default an anonymous memory map is allocated; create the cache before
+    forking and children inherit both the table and its lock.  Pass a ``name``
+    to use a named :class:`multiprocessing.shared_memory.SharedMemory` block
+    which unrelated processes may attach to using ``create=False``, supplying
+    the same geometry.  Named caches are locked by default using ``flock`` on a
+    lock file in the temporary directory derived from the name, so every
+    process using the block excludes the others; where ``flock`` is
+    unavailable a ``lock`` shared by all processes must be supplied, which
+    restricts attaching processes to those inheriting it.  Only the creating
+    process registers the block for cleanup; attaching processes may exit
+    freely, and the creator should call :meth:`unlink`, which also removes the
+    lock file, when it is no longer needed.
+
+    Keys are matched by their pickled form, so keys which compare equal but
+    serialize differently (``1`` and ``1.0``) are distinct.  Entries whose
+    pickled key and value do not fit in a slot are not stored.  Supports the
+    mapping interface of :class:`marrow.util.object.Cache`, including ``ttl``;
+    expiry is measured using the wall clock so it is consistent between
+    processes.
+    """
+
+    MAGIC = b'MUSC'
+    HEADER = struct.Struct('<4sIIII')  # Magic, buckets, ways, slot size, entry count.
+    SLOT = struct.Struct('<BBIIId')  # Used, referenced, hash, key length, value length, expiry.
+
+    clock = staticmethod(time.time)
+
+    def __init__(self, capacity, slot_size=1024, ways=8, ttl=None, name=None, create=True, lock=None):
+        if slot_size <= self.SLOT.size:
+            raise ValueError("Slot size must exceed the {0} byte slot header.".format(self.SLOT.size))
+
+        self.buckets = max(-(-capacity // ways), 1)
+        self.ways = ways
+        self.slot_size = slot_size
+        self.ttl = ttl
+
+        self._lock_file = self._lock_path = None
+
+        if lock is None and name is not None and fcntl is not None:
+            path = 'marrow-util-{0}.lock'.format(name.strip('/').replace('/', '-'))
+            lock = self._lock_file = _FileLock(os.path.join(tempfile.gettempdir(), path))
+            self._lock_path = lock.path
+
+        self.lock = lock if lock is not None else multiprocessing.Lock()
+
+        self._hands = self.HEADER.size
+        self._slots = self._hands + self.buckets
+        length = self._slots + self.buckets * ways * slot_size
+
+        self._memory = None
+
+        if name is None:
+            self._buffer = mmap.mmap(-1, length)
+
+        else:
+            if shared_memory is None: # pragma: no cover
+                raise ImportError("Named shared caches require Python 3.8 or later.")
+
+            self._memory = shared_memory.SharedMemory(name, True, length) if create else _attach(name, length)
+            self._buffer = self._memory.buf
+
+            if create:
+                _created.add(self._memory.name)
+
+        if create:
+            self.HEADER.pack_into(self._buffer, 0, self.MAGIC, self.buckets, ways, slot_size, 0)
+            return
+
+        magic, buckets, ways, slot_size, count = self.HEADER.unpack_from(self._buffer, 0)
+
+        if (magic, buckets, ways, slot_size) != (self.MAGIC, self.buckets, self.ways, self.slot_size):
+            self.close()
+            raise ValueError("Shared memory block {0!r} does not contain a compatible cache.".format(name))
+
+    @property
+    def name(self):
+        return self._memory.name if self._memory is not None else None
+
+    @property
+    def capacity(self):
+        return self.buckets * self.ways
+
+    def close(self):
+        """Detach from the shared memory; other processes are unaffected."""
+
+        if self._memory is not None:
+            self._buffer = None
+            self._memory.close()
+
+        else:
+            self._buffer.close()
+
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def unlink(self):
+        """Request destruction of a named shared memory block once all processes have closed it."""
+
+        if self._memory is not None:
+            self._memory.unlink()
+
+        if self._lock_path is not None:
+            try:
+                os.unlink(self._lock_path)
+            except OSError:
+                pass
+
+    def _count(self, delta):
+        offset = self.HEADER.size - 4
+        count, = struct.unpack_from('<I', self._buffer, offset)
+        struct.pack_into('<I', self._buffer, offset, count + delta)
+
+    def _bucket(self, key):
+        """Serialize a key, returning its bytes, hash, and bucket index."""
+
+        key = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+        value = zlib.crc32(key) & 0xffffffff
+        return key, value, value % self.buckets
+
+    def _find(self, bucket, value, key):
+        buffer, unpack, header = self._buffer, self.SLOT.unpack_from, self.SLOT.size
+        offset = self._slots + bucket * self.ways * self.slot_size
+
+        for i in range(self.ways):
+            used, referenced, hashed, length, size, expires = unpack(buffer, offset)
+
+            if used and hashed == value and length == len(key) and buffer[offset + header:offset + header + length] == key:
+                return offset
+
+            offset += self.slot_size
+
+        return None
+
+    def _free(self, bucket):
+        """Return the offset of an unused slot in the bucket, evicting one if needed."""
+
+        buffer, slot = self._buffer, self.slot_size
+        base = self._slots + bucket * self.ways * slot
+
+        for i in range(self.ways):
+            if not buffer[base + i * slot]:
+                return base + i * slot
+
+        hand = buffer[self._hands + bucket] % self.ways
+
+        while True:
+            offset = base + hand * slot
+            hand = (hand + 1) % self.ways
+
+            if buffer[offset + 1]:
+                buffer[offset + 1] = 0  # Second chance.
+                continue
+
+            buffer[self._hands + bucket] = hand
+            buffer[offset] = 0
+            self._count(-1)
+
+            return offset
+
+    def __len__(self):
+        return self.HEADER.unpack_from(self._buffer, 0)[-1]
+
+    def __contains__(self, key):
+        key, value, bucket = self._bucket(key)
+
+        with self.lock:
+            offset = self._find(bucket, value, key)
+
+            if offset is None:
+                return False
+
+            expires = self.SLOT.unpack_from(self._buffer, offset)[-1]
+            return not expires or expires > self.clock()
+
+    def __getitem__(self, key):
+        raw, value, bucket = self._bucket(key)
+        buffer = self._buffer
+
+        with self.lock:
+            offset = self._find(bucket, value, raw)
+
+            if offset is None:
+                raise KeyError(key)
+
+            used, referenced, hashed, length, size, expires = self.SLOT.unpack_from(buffer, offset)
+
+            if expires and expires <= self.clock():
+                buffer[offset] = 0
+                self._count(-1)
+                raise KeyError(key)
+
+            buffer[offset + 1] = 1
+            start = offset + self.SLOT.size + length
+            data = bytes(buffer[start:start + size])
+
+        return pickle.loads(data)
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def set(self, key, value, ttl=NoDefault):
+        """Store a value, optionally overriding the default time-to-live.
+
+        A ``ttl`` of None stores the value without expiry.  Values which do not
+        fit within a slot are not stored, and any previous value is removed.
+        """
+
+        if ttl is NoDefault:
+            ttl = self.ttl
+
+        raw, hashed, bucket = self._bucket(key)
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = 0.0 if ttl is None else self.clock() + ttl
+        header = self.SLOT.size
+        buffer = self._buffer
+
+        with self.lock:
+            offset = self._find(bucket, hashed, raw)
+
+            if header + len(raw) + len(data) > self.slot_size:
+                if offset is not None:
+                    buffer[offset] = 0
+                    self._count(-1)
+
+                return
+
+            if offset is None:
+                offset = self._free(bucket)
+                self._count(1)
+
+            start = offset + header
+            buffer[start:start + len(raw)] = raw
+            start += len(raw)
+            buffer[start:start + len(data)] = data
+            self.SLOT.pack_into(buffer, offset, 1, 0, hashed, len(raw), len(data), expires)
+
+    def __delitem__(self, key):
+        raw, value, bucket = self._bucket(key)
+
+        with self.lock:
+            offset = self._find(bucket, value, raw)
+
+            if offset is None:
+                raise KeyError(key)
+
+            self._buffer[offset] = 0
+            self._count(-1)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+
+        except KeyError:
+            return default
+
+    def setdefault(self, key, default=None):
+        try:
+            return self[key]
+
+        except KeyError:
+            self[key] = default
+            return default
+
+    def get_or_load(self, key, loader, ttl=NoDefault):
+        try:
+            return self[key]
+
+        except KeyError:
+            value = loader(key)
+            self.set(key, value, ttl)
+            return value
+
+    def pop(self, key, default=NoDefault):
+        try:
+            value = self[key]
+
+        except KeyError:
+            if default is NoDefault:
+                raise
+
+            return default
+
+        try:
+            del self[key]
+
+        except KeyError: # pragma: no cover
+            pass  # Removed by another process in the interim.
+
+        return value
+
+    def update(self, *args, **kw):
+        for key, value in dict(*args, **kw).items():
+            self[key] = value
+
+    def clear(self):
+        buffer, slot = self._buffer, self.slot_size
+
+        with self.lock:
+            for offset in range(self._slots, self._slots + self.capacity * slot, slot):
+                buffer[offset] = 0
+
+            buffer[self._hands:self._slots] = bytes(bytearray(self.buckets))
+            struct.pack_into('<I', buffer, self.HEADER.size - 4, 0)
+
+    def items(self):
+        buffer, slot, header = self._buffer, self.slot_size, self.SLOT.size
+        now, raw = self.clock(), []
+
+        with self.lock:
+            for offset in range(self._slots, self._slots + self.capacity * slot, slot):
+                used, referenced, hashed, length, size, expires = self.SLOT.unpack_from(buffer, offset)
+
+                if used and (not expires or expires > now):
+                    start = offset + header
+                    raw.append((bytes(buffer[start:start + length]), bytes(buffer[start + length:start + length + size])))
+
+        return [(pickle.loads(key), pickle.loads(value)) for key, value in raw]
+
+    def keys(self):
+        return [key for key, value in self.items()]
+
+    def values(self):
+        return [value for key, value in self.items()]
+
+    def __iter__(self):
+        return iter(self.keys())
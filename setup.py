@@ -52,7 +52,5 @@ https://github.com/marrow/marrow.util""",
         packages = find_packages(exclude=['examples', 'tests']),
         zip_safe = True,
         include_package_data = True,
-        package_data = {'': ['README.textile', 'LICENSE']},
-        
-        namespace_packages = ['marrow', 'marrow.util']
+        package_data = {'': ['README.textile', 'LICENSE']}
     )
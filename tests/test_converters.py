@@ -1,10 +1,17 @@
 # encoding: utf-8
 
+import io
 import sys
-from unittest import TestCase
+from array import array
+from unittest import TestCase, skipIf
 
 from marrow.util import convert as conv
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 if sys.version_info[:2] >= (3, 0):
     from uni_compat3 import uchar
@@ -29,7 +36,58 @@ def test_falsehoods():
 class TestConverters(TestCase):
     def test_boolean_exceptions(self):
         self.assertRaises(ValueError, lambda: conv.boolean('oui'))
+        self.assertRaises(ValueError, lambda: conv.boolean(b'oui'))
+    
+    def test_boolean_spellings(self):
+        for value in ('TRUE', 'tRuE', ' yes ', '\tOn\n', b'yes', b' True ', b'1'):
+            self.assertTrue(conv.boolean(value) is True, value)
+        
+        for value in ('FALSE', 'No', ' off', b'n', b'FALSE', b' 0 '):
+            self.assertTrue(conv.boolean(value) is False, value)
+    
+    def test_boolean_many(self):
+        self.assertEqual(conv.boolean_many(['yes', ' No ', b'on', 1, 0, [], ['x']]), [True, False, True, True, False, False, True])
+        self.assertEqual(conv.boolean_many(iter(('t', 'F'))), [True, False])
+        self.assertEqual(conv.boolean_many(()), [])
+        self.assertRaises(ValueError, lambda: conv.boolean_many(['yes', 'oui']))
+    
+    @skipIf(numpy is None, "Requires NumPy.")
+    def test_boolean_many_array(self):
+        result = conv.boolean_many(numpy.array([['yes', 'No'], [' on', 'yes']]))
+        
+        self.assertEqual(result.dtype, bool)
+        self.assertEqual(result.tolist(), [[True, False], [True, True]])
+        self.assertEqual(conv.boolean_many(numpy.array([b'0', b'T'])).tolist(), [False, True])
+        self.assertRaises(ValueError, lambda: conv.boolean_many(numpy.array(['yes', 'oui'])))
         
+
+    def test_integers(self):
+        self.assertEqual(conv.integers(['1', ' 2 ', 3, b'4']), (array('q', [1, 2, 3, 4]), []))
+        self.assertEqual(conv.integers('1 2 x 4'), (array('q', [1, 2, 0, 4]), [2]))
+        self.assertEqual(conv.integers(b'1,2,,4', ',', -1), (array('q', [1, 2, -1, 4]), [2]))
+        self.assertEqual(conv.integers(memoryview(b'5\n6')), (array('q', [5, 6]), []))
+        self.assertEqual(conv.integers(iter([None, '1.5', 2 ** 70])), (array('q', [0, 0, 0]), [0, 1, 2]))
+        self.assertEqual(conv.integers([]), (array('q'), []))
+    
+    def test_numbers(self):
+        self.assertEqual(conv.numbers('1 2 3'), (array('q', [1, 2, 3]), []))
+        self.assertEqual(conv.numbers('1.5 2 3e2'), (array('d', [1.5, 2.0, 300.0]), []))
+        self.assertEqual(conv.numbers(['1', 'x', '2']), (array('q', [1, 0, 2]), [1]))
+        self.assertEqual(conv.numbers(['1', 'x', '2.5', None, '3']), (array('d', [1.0, 0.0, 2.5, 0.0, 3.0]), [1, 3]))
+        self.assertEqual(conv.numbers(b'0.5|y', '|'), (array('d', [0.5, 0.0]), [1]))
+        self.assertEqual(conv.numbers([2.5, '0.5']), (array('d', [2.5, 0.5]), []))
+        self.assertEqual(conv.numbers(['0.5', 2.5]), (array('d', [0.5, 2.5]), []))
+        self.assertEqual(conv.numbers(iter([1, 'x', 2.5])), (array('d', [1.0, 0.0, 2.5]), [1]))
+    
+    @skipIf(numpy is None, "Requires NumPy.")
+    def test_numeric_arrays(self):
+        result, invalid = conv.integers('1 2 x', numpy=True)
+        
+        self.assertEqual(result.dtype, numpy.int64)
+        self.assertEqual(result.tolist(), [1, 2, 0])
+        self.assertEqual(invalid, [2])
+        self.assertEqual(conv.numbers('1.5 2', numpy=True)[0].dtype, numpy.float64)
+    
     def test_array(self):
         self.assertEqual(conv.array(None), [])
         
@@ -50,6 +108,23 @@ class TestConverters(TestCase):
         self.assertEqual(conv.array("baz  diz", None), ["baz", "diz"])
         self.assertEqual(conv.array("baz   diz", None, False, False), ["baz", "diz"])
     
+    def test_iter_array(self):
+        self.assertEqual(list(conv.iter_array(None)), [])
+        self.assertEqual(list(conv.iter_array((4, '', 5))), [4, 5])
+        self.assertEqual(list(conv.iter_array("foo,bar, baz   , diz")), ["foo", "bar", "baz", "diz"])
+        self.assertEqual(list(conv.iter_array("foo,,bar,", empty=True)), ["foo", '', "bar", ''])
+        self.assertEqual(list(conv.iter_array(b"foo | bar", '|')), [b"foo", b"bar"])
+        self.assertEqual(list(conv.iter_array(memoryview(b"baz  diz\n"), None)), [b"baz", b"diz"])
+        self.assertEqual(list(conv.iter_array('', empty=True)), [''])
+    
+    def test_iter_array_chunks(self):
+        text = "alpha::beta :: gamma::::delta"
+        
+        for size in (1, 2, 3, 7, 100):
+            self.assertEqual(list(conv.iter_array(text, '::', size=size)), conv.array(text, '::'))
+            self.assertEqual(list(conv.iter_array(io.StringIO(text), '::', size=size)), conv.array(text, '::'))
+            self.assertEqual(list(conv.iter_array(io.BytesIO(b"a  b\tc "), None, size=size)), [b"a", b"b", b"c"])
+    
     def test_keyword_parser_regex(self):
         self.assertEqual(conv.tags.pattern, '[\\s \t,]*("[^"]+"|\'[^\']+\'|[^ \t,]+)[ \t,]*')
         self.assertEqual(conv.terms.pattern, '[\\s \t]*([+-]?"[^"]+"|\'[^\']+\'|[^ \t]+)[ \t]*')
@@ -91,3 +166,148 @@ class TestConverters(TestCase):
                 conv.terms('cat dog -leather'),
                 [(None, 'cat'), (None, 'dog'), ('-', 'leather')]
             )
+    
+    def test_scanner(self):
+        tags = conv.KeywordProcessor(' \t,', normalize=lambda s: s.lower().strip('"'), sort=True, result=set, engine='scanner')
+        terms = conv.KeywordProcessor(groups=[None, '+', '-'], group=tuple, engine='scanner')
+        
+        self.assertEqual(
+                tags('"high altitude" "Melting Panda" panda,bends'),
+                set(('bends', 'high altitude', 'melting panda', 'panda'))
+            )
+        
+        self.assertEqual(
+                terms('animals +cat -dog +"medical treatment"'),
+                (['animals'], ['cat', '"medical treatment"'], ['dog'])
+            )
+        
+        self.assertEqual(terms("+'kitty death' -\"x\"y 'un closed"), (["death'", 'y', "'un", 'closed'], ["'kitty"], ['"x"']))
+        
+        terms.group = dict
+        self.assertEqual(terms(' foo  bar "baz"diz       '), {None: ['foo', 'bar', '"baz"', 'diz'], '+': [], '-': []})
+        
+        terms.group = False
+        self.assertEqual(terms('cat dog -leather'), [(None, 'cat'), (None, 'dog'), ('-', 'leather')])
+    
+    def test_scanner_matches_regex(self):
+        values = ['', 'a', ' a  b ', 'a,b,,c', '"a b" c', "'a b'c \"d", '+"a b" -c', 'x"y z"', '""', '"a""b"', "+'a' '+b'", '-"a\tb"\t+c']
+        
+        for options in (dict(), dict(separators=' \t,'), dict(groups=[None, '+', '-']), dict(groups=['+', '-'], group=list, sort=True), dict(quotes=None)):
+            regex = conv.KeywordProcessor(**options)
+            scanner = conv.KeywordProcessor(engine='scanner', **options)
+            
+            for value in values:
+                self.assertEqual(scanner.split(value), regex.split(value), (options, value))
+    
+    def test_unknown_engine(self):
+        self.assertRaises(ValueError, lambda: conv.KeywordProcessor(engine='lexer'))
+    
+    def test_cache(self):
+        tags = conv.KeywordProcessor(' \t,', normalize=lambda s: s.lower().strip('"'), sort=True, result=set, cache=2)
+        
+        first = tags('panda, "Melting Panda"')
+        self.assertEqual(first, frozenset(('panda', 'melting panda')))
+        self.assertTrue(isinstance(first, frozenset))
+        self.assertTrue(tags('panda, "Melting Panda"') is first)
+        
+        tags('a')
+        tags('b')
+        self.assertEqual(tags.stats(), dict(hits=1, misses=3, ratio=0.25, size=2, capacity=2))
+        
+        tags('panda, "Melting Panda"')
+        self.assertEqual((tags.hits, tags.misses), (1, 4))
+        
+        tags.clear()
+        self.assertEqual(tags.stats(), dict(hits=0, misses=0, ratio=0.0, size=0, capacity=2))
+    
+    def test_cache_immutable(self):
+        terms = conv.KeywordProcessor(groups=[None, '+', '-'], group=tuple, cache=8)
+        self.assertEqual(terms('animals +cat -dog'), (('animals', ), ('cat', ), ('dog', )))
+        
+        terms = conv.KeywordProcessor(groups=[None, '+', '-'], group=dict, cache=8)
+        result = terms('animals +cat')
+        
+        self.assertEqual(dict(result), {None: ('animals', ), '+': ('cat', ), '-': ()})
+        
+        def assign():
+            result['+'] = ()
+        
+        self.assertRaises(TypeError, assign)
+        
+        terms = conv.KeywordProcessor(groups=[None, '+', '-'], cache=8)
+        self.assertEqual(terms('cat -leather'), ((None, 'cat'), ('-', 'leather')))
+        
+        self.assertEqual(conv.tags.stats()['capacity'], 0)
+    
+    def test_join_grouped(self):
+        terms = conv.KeywordProcessor(groups=[None, '+', '-'], group=dict)
+        joined = terms.join({None: ['animals'], '+': ['medical treatment'], '-': []})
+        
+        self.assertEqual(joined, 'animals +"medical treatment"')
+        self.assertEqual(terms(joined), {None: ['animals'], '+': ['"medical treatment"'], '-': []})
+    
+    def test_many(self):
+        terms = conv.KeywordProcessor(groups=[None, '+', '-'], group=tuple)
+        
+        self.assertEqual(list(terms.split_many(['a +b', 'c -"d e"'])), [(['a'], ['b'], []), (['c'], [], ['"d e"'])])
+        self.assertEqual(list(conv.tags.join_many([['high altitude', 'panda'], ('bends', ), frozenset()])), ['"high altitude" panda', 'bends', ''])
+        self.assertEqual(list(conv.KeywordProcessor(' ', None).join_many([['a b']])), ['a b'])
+        self.assertRaises(ValueError, lambda: list(conv.tags.join_many(['panda'])))
+    
+    def test_many_processes(self):
+        terms = conv.KeywordProcessor(groups=[None, '+', '-'], cache=10)
+        values = ['cat {0} -dog +"x {0}"'.format(i) for i in range(25)]
+        
+        self.assertEqual(list(terms.split_many(values, 2, 4)), [terms.split(value) for value in values])
+        self.assertEqual(list(terms.join_many([['a b', str(i)] for i in range(25)], 2, 4)), ['"a b" {0}'.format(i) for i in range(25)])
+        self.assertEqual(list(terms.join_many([], 2)), [])
+        
+        values = ['Cat, "Small Dog" {0}'.format(i) for i in range(10)]
+        self.assertEqual(list(conv.tags.split_many(values, 2, 3)), [set(['cat', 'small dog', str(i)]) for i in range(10)])
+    
+    def test_record(self):
+        convert = conv.RecordConverter([('id', conv.integer), ('active', conv.boolean), ('score', conv.number), ('tags', conv.tags), ('name', None)])
+        
+        self.assertEqual(convert.fields, ('id', 'active', 'score', 'tags', 'name'))
+        self.assertEqual(convert({'id': '1', 'active': 'yes', 'score': '2.5', 'tags': 'a b', 'name': 'x', 'other': 1}),
+                {'id': 1, 'active': True, 'score': 2.5, 'tags': set(['a', 'b']), 'name': 'x'})
+        self.assertEqual(convert(('1', ' No ', '3', '', None)), (1, False, 3, set(), None))
+        self.assertEqual(convert(['1', True, 4, 'c', 'y']), (1, True, 4, set(['c']), 'y'))
+    
+    def test_record_errors(self):
+        convert = conv.RecordConverter(dict(id=conv.integer, active=conv.boolean), default=-1)
+        
+        try:
+            convert({'id': 'x', 'active': 'maybe'})
+        except conv.ConversionError as e:
+            self.assertEqual(sorted(e.errors), ['active', 'id'])
+            self.assertTrue(isinstance(e.errors['id'], ValueError))
+            self.assertEqual(e.result, {'id': -1, 'active': -1})
+        else:
+            self.fail("ConversionError not raised.")
+        
+        self.assertRaises(conv.ConversionError, convert, {'id': '1'})
+        self.assertRaises(conv.ConversionError, convert, ('1', ))
+    
+    def test_record_many(self):
+        convert = conv.RecordConverter([('id', conv.integer), ('active', conv.boolean)])
+        rows = [{'id': '1', 'active': 'on'}, {'id': 'x', 'active': 'T'}, {'active': 'nope'}, ('2', 'off')]
+        results = list(convert.many(iter(rows)))
+        
+        self.assertEqual([result for result, errors in results], [{'id': 1, 'active': True}, {'id': None, 'active': True},
+                {'id': None, 'active': None}, (2, False)])
+        self.assertEqual([sorted(errors or ()) for result, errors in results], [[], ['id'], ['active', 'id'], []])
+        self.assertTrue(isinstance(results[2][1]['id'], KeyError))
+        
+        results = list(convert.many([('3', 'y'), ('4', )]))
+        
+        self.assertEqual(results[0], ((3, True), None))
+        self.assertEqual(results[1][0], (4, None))
+        self.assertTrue(isinstance(results[1][1]['active'], IndexError))
+        self.assertEqual(list(convert.many([])), [])
+    
+    def test_record_keys(self):
+        convert = conv.RecordConverter([(0, conv.integer), ((1, 2), conv.number), ('it\'s', None)])
+        
+        self.assertEqual(convert({0: '1', (1, 2): '1.5', "it's": 'x'}), {0: 1, (1, 2): 1.5, "it's": 'x'})
+        self.assertEqual(convert(('1', '2', 'y')), (1, 2, 'y'))
@@ -0,0 +1,62 @@
+# encoding: utf-8
+
+import os
+import subprocess
+import sys
+
+from unittest import TestCase
+
+import marrow.util
+
+
+# Importing the bare package must not drag in any submodule or heavy dependency.
+FORBIDDEN = ['pkg_resources', 'inspect', 'logging', 'email', 'socket', 'threading'] + \
+        ['marrow.util.' + module for module in marrow.util._exports]
+
+# Generous upper bound on the cumulative cold import time of marrow.util, in microseconds.
+BUDGET = 100000
+
+
+
+def cold_import(module):
+    """Import a module in a fresh interpreter, returning a mapping of imported module names to cumulative microseconds."""
+
+    environ = dict(os.environ)
+    environ['PYTHONPATH'] = os.pathsep.join([os.path.dirname(os.path.dirname(marrow.util.__path__[0]))] +
+            ([environ['PYTHONPATH']] if environ.get('PYTHONPATH') else []))
+
+    process = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+            stderr=subprocess.PIPE, env=environ)
+    output = process.communicate()[1].decode('ascii', 'replace')
+
+    timings = dict()
+
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        own, cumulative, name = line[12:].split('|')
+        timings[name.strip()] = int(cumulative)
+
+    return timings
+
+
+class TestLazyPackage(TestCase):
+    def test_exports(self):
+        from marrow.util.bunch import Bunch
+        from marrow.util.object import Cache
+
+        self.assertTrue(marrow.util.Bunch is Bunch)
+        self.assertTrue(marrow.util.Cache is Cache)
+        self.assertTrue('URL' in dir(marrow.util))
+        self.assertRaises(AttributeError, lambda: marrow.util.Missing)
+
+        for name in marrow.util.__all__:
+            self.assertTrue(getattr(marrow.util, name) is not None, name)
+
+    def test_cold_import(self):
+        timings = cold_import('marrow.util')
+
+        self.assertTrue('marrow.util' in timings)
+        self.assertEqual([name for name in FORBIDDEN if name in timings], [])
+        self.assertTrue(timings['marrow.util'] < BUDGET, "Cold import took {0} us.".format(timings['marrow.util']))
@@ -1,9 +1,20 @@
 # encoding: utf-8
 
-from unittest import TestCase
+import copy
+import gc
+import functools
+import logging
+import pickle
+import sys
+import threading
+import time
+import weakref
+
+from unittest import TestCase, skipIf
 
 from marrow.util.bunch import Bunch
-from marrow.util.object import flatten, load_object, Cache
+from marrow.util.object import flatten, flat, yield_property, yield_keyvalue, extract_columns, merge, merge_layers, load_object, load_objects, invalidate_object, Cache, ConcurrentCache, CacheReaper, cached
+from marrow.util.object import SegmentedCache, FrequencySketch, getargspec, compile_binder, LoggingFile, CounterMeta
 
 
 
@@ -15,11 +26,209 @@ class TestOOUtils(TestCase):
                 [1, 2, 3, 42, None, 4, 5, 6, 7, 8, 9, 10]
             )
     
+    def test_flatten_depth(self):
+        nested = [1, [2, [3, [4, 'five']]], (6, ), 'seven', b'eight']
+
+        self.assertEqual(list(flatten(nested)), [1, 2, 3, 4, 'five', 6, 'seven', b'eight'])
+        self.assertEqual(list(flatten(nested, 0)), nested)
+        self.assertEqual(list(flatten(nested, 1)), [1, 2, [3, [4, 'five']], 6, 'seven', b'eight'])
+        self.assertEqual(list(flatten(nested, 2)), [1, 2, 3, [4, 'five'], 6, 'seven', b'eight'])
+
+    def test_flatten_deep(self):
+        nested = [0]
+
+        for i in range(1, 10000):
+            nested = [i, nested]
+
+        self.assertEqual(len(list(flatten(nested))), 10000)
+        self.assertEqual(len(flat(nested)), 10000)
+
+    def test_flat(self):
+        nested = [[[1, 2, 3], (42, None)], [4, 5], [6], 7, (8, 9, 10), set([11]), 'twelve']
+
+        self.assertEqual(flat(nested), [1, 2, 3, 42, None, 4, 5, 6, 7, 8, 9, 10, 11, 'twelve'])
+        self.assertEqual(flat(nested, 1), [[1, 2, 3], (42, None), 4, 5, 6, 7, 8, 9, 10, 11, 'twelve'])
+        self.assertEqual(flat([1, [2, [3, [4]]]], 2), [1, 2, 3, [4]])
+
+    def test_flat_numeric(self):
+        self.assertEqual(list(flat([[1, 2], (3, [4])], numeric=True)), [1, 2, 3, 4])
+        self.assertEqual(list(flat([[1, 2.5], 3], numeric=True)), [1.0, 2.5, 3.0])
+        self.assertRaises(TypeError, lambda: flat([1, ['two']], numeric=True))
+
+    def test_yield(self):
+        records = [Bunch(name='a', age=1), Bunch(name='b'), dict(age=3)]
+
+        self.assertEqual(list(yield_property(records[:2], 'name')), ['a', 'b'])
+        self.assertEqual(list(yield_keyvalue(records, 'age', 0)), [1, 0, 3])
+        self.assertEqual(list(yield_keyvalue([(1, 2), (3, )], 1)), [2, None])
+
+    def test_extract_columns(self):
+        records = [Bunch(name='a', age=1), Bunch(name='b', age=2)]
+
+        self.assertEqual(extract_columns(records, ['name', 'age']), [['a', 'b'], [1, 2]])
+        self.assertEqual(extract_columns(iter(records), ['name']), [['a', 'b']])
+        self.assertEqual(extract_columns(records, ['name', 'age'], items=True), [['a', 'b'], [1, 2]])
+        self.assertEqual(extract_columns([], ['name', 'age']), [[], []])
+        self.assertEqual(extract_columns(records, []), [])
+
+        records.append(Bunch(name='c'))
+        self.assertEqual(extract_columns(records, ['name', 'age'], items=True), [['a', 'b', 'c'], [1, 2, None]])
+        self.assertEqual(extract_columns(records, ['age'], dict(age=0), items=True), [[1, 2, 0]])
+        self.assertEqual(extract_columns([(1, 2), (3, )], [0, 1], items=True), [[1, 3], [2, None]])
+
+        class Record(object):
+            def __init__(self, **kw):
+                self.__dict__.update(kw)
+
+        objects = [Record(name='a', age=1), Record(name='b')]
+        names, ages = extract_columns(objects, ['name', 'age'], 0, numeric=['age'])
+
+        self.assertEqual(names, ['a', 'b'])
+        self.assertEqual(list(ages), [1, 0])
+        self.assertRaises(TypeError, lambda: extract_columns(objects, ['name'], numeric=True))
+
+    def test_merge(self):
+        source = dict(a=1, nested=dict(b=2, deeper=dict(c=3)))
+        target = dict(a=0, nested=5, other=dict(d=4))
+
+        self.assertTrue(merge(target, source) is target)
+        self.assertEqual(target, dict(a=1, nested=dict(b=2, deeper=dict(c=3)), other=dict(d=4)))
+
+        target['nested']['deeper']['c'] = 'changed'
+        self.assertEqual(source['nested']['deeper']['c'], 3)
+
+        merge(target, dict(nested=dict(e=5)))
+        self.assertEqual(target['nested'], dict(b=2, deeper=dict(c='changed'), e=5))
+
+    def test_merge_layers(self):
+        base = dict(name='base', shared=dict(x=1), nested=dict(a=1, tags=['a'], deeper=dict(k=set([1]))))
+        site = dict(name='site', nested=dict(b=2, tags=['b'], deeper=dict(k=set([2]))))
+        user = dict(nested=dict(tags=['c'], deeper=5))
+
+        result = merge_layers([base, site, None, user])
+
+        self.assertEqual(result, dict(name='site', shared=dict(x=1), nested=dict(a=1, b=2, tags=['c'], deeper=5)))
+        self.assertTrue(dict.__getitem__(result, 'shared') is base['shared'])
+        self.assertEqual(base['nested'], dict(a=1, tags=['a'], deeper=dict(k=set([1]))))
+
+        result = merge_layers([base, site], lists='append', sets='union')
+        self.assertEqual(result['nested'], dict(a=1, b=2, tags=['a', 'b'], deeper=dict(k=set([1, 2]))))
+        self.assertEqual(base['nested']['tags'], ['a'])
+
+        seen = []
+        def conflict(path, old, new):
+            seen.append(path)
+            return old
+
+        result = merge_layers([base, site], conflict=conflict)
+        self.assertEqual(result['name'], 'base')
+        self.assertEqual(sorted(seen), [('name', ), ('nested', 'deeper', 'k'), ('nested', 'tags')])
+
+        self.assertEqual(merge_layers([dict(a=dict(b=1)), dict(a=2), dict(a=dict(c=3))]), dict(a=dict(c=3)))
+        self.assertEqual(merge_layers([]), dict())
+        self.assertRaises(ValueError, lambda: merge_layers([], lists='prepend'))
+
+    def test_merge_layers_isolation(self):
+        base = dict(db=dict(host='localhost', options=dict(timeout=5)), cache=dict(size=1))
+        site = dict(db=dict(port=5432), log=dict(level='info'))
+
+        result = merge_layers([base, site])
+        result['db']['host'] = 'remote'
+        result['db']['options']['timeout'] = 10
+        result.get('cache')['size'] = 2
+        result.setdefault('log', None)['level'] = 'debug'
+        result.pop('db')
+
+        for value in result.values():
+            value['added'] = True
+
+        self.assertEqual(base, dict(db=dict(host='localhost', options=dict(timeout=5)), cache=dict(size=1)))
+        self.assertEqual(site, dict(db=dict(port=5432), log=dict(level='info')))
+        self.assertEqual(result, dict(cache=dict(size=2, added=True), log=dict(level='debug', added=True)))
+
+        again = merge_layers([result, dict(cache=dict(size=3))])
+        again['log']['level'] = 'error'
+
+        self.assertEqual(result['log']['level'], 'debug')
+        self.assertEqual(again, dict(cache=dict(size=3, added=True), log=dict(level='error', added=True)))
+
+    def test_merge_layers_copies(self):
+        base = dict(db=dict(host='localhost', options=dict(timeout=5)))
+        expected = dict(db=dict(host='localhost', options=dict(timeout=5)), log=dict(level='info'))
+
+        for duplicate in (lambda value: pickle.loads(pickle.dumps(value)), lambda value: pickle.loads(pickle.dumps(value, 0)),
+                copy.copy, copy.deepcopy):
+            result = duplicate(merge_layers([base, dict(log=dict(level='info'))]))
+            self.assertEqual(result, expected)
+
+            result['db']['options']['timeout'] = 10
+            self.assertEqual(base['db']['options']['timeout'], 5)
+
     def test_load_object(self):
         self.failUnless(load_object('marrow.util.bunch:Bunch') is Bunch)
         self.assertRaises(AttributeError, lambda: load_object('marrow.util.bunch:Foo'))
         self.assertRaises(ImportError, lambda: load_object('marrow.foo:Bar'))
 
+    def test_load_object_cache(self):
+        from marrow.util import object as module
+
+        invalidate_object()
+        self.assertIs(load_object('marrow.util.bunch:Bunch'), Bunch)
+        self.assertTrue('marrow.util.bunch:Bunch' in module._objects)
+
+        invalidate_object('marrow.util.bunch:Bunch')
+        self.assertFalse('marrow.util.bunch:Bunch' in module._objects)
+
+    def test_load_plugin(self):
+        from setuptools.command.sdist import sdist
+
+        invalidate_object()
+        self.assertIs(load_object('sdist', 'distutils.commands'), sdist)
+        self.assertIs(load_object('sdist', 'distutils.commands'), sdist)
+        self.assertRaises(ValueError, lambda: load_object('missing', 'distutils.commands'))
+
+        invalidate_object(namespace='distutils.commands')
+        self.assertIs(load_object('sdist', 'distutils.commands'), sdist)
+
+    def test_entry_point_cache(self):
+        import os
+        import shutil
+        import tempfile
+        from setuptools.command.sdist import sdist
+        from marrow.util import object as module
+
+        directory = tempfile.mkdtemp()
+        original, scan = module.ENTRY_POINT_CACHE, module._scan_entry_points
+        module.ENTRY_POINT_CACHE = os.path.join(directory, 'entry_points.json')
+
+        try:
+            invalidate_object()
+            self.assertIs(load_object('sdist', 'distutils.commands'), sdist)
+            self.assertTrue(os.path.exists(module.ENTRY_POINT_CACHE))
+
+            def fail():
+                raise AssertionError("Entry points rescanned despite cache.")
+
+            module._scan_entry_points = fail
+            invalidate_object()
+            self.assertIs(load_object('sdist', 'distutils.commands'), sdist)
+
+        finally:
+            module.ENTRY_POINT_CACHE, module._scan_entry_points = original, scan
+            invalidate_object()
+            shutil.rmtree(directory)
+
+    def test_load_objects(self):
+        from marrow.util import bunch
+
+        invalidate_object()
+        self.assertEqual(
+                load_objects(['marrow.util.bunch:Bunch', 'marrow.util.object:Cache', 'marrow.util.bunch:MultiBunch', 'marrow.util.bunch']),
+                [Bunch, Cache, bunch.MultiBunch, bunch]
+            )
+        self.assertEqual(load_objects(['marrow.util.bunch:Bunch']), [Bunch])
+        self.assertRaises(AttributeError, lambda: load_objects(['marrow.util.bunch:Foo']))
+
 
 class TestOOCache(TestCase):
     def setUp(self):
@@ -72,3 +281,831 @@ class TestOOCache(TestCase):
         self.cache._restrict()
 
         self.assertEqual(len(self.cache), 0)
+
+    def test_delete(self):
+        del self.cache['B']
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual([i for i in self.cache], ['C', 'A'])
+        self.assertRaises(KeyError, lambda: self.cache['B'])
+
+        self.cache['D'] = 3
+        self.cache['E'] = 4
+        self.assertEqual([i for i in self.cache], ['E', 'D', 'C'])
+
+    def test_dict_methods(self):
+        self.assertEqual(self.cache.get('A'), 0)
+        self.assertEqual(self.cache.get('Z', 'default'), 'default')
+        self.assertEqual(self.cache.keys(), ['A', 'C', 'B'])
+        self.assertEqual(self.cache.values(), [0, 2, 1])
+        self.assertEqual(self.cache.items(), [('A', 0), ('C', 2), ('B', 1)])
+
+        self.assertEqual(self.cache.pop('C'), 2)
+        self.assertEqual(self.cache.pop('C', None), None)
+        self.assertRaises(KeyError, lambda: self.cache.pop('C'))
+
+        self.assertEqual(self.cache.popitem(), ('B', 1))
+        self.assertEqual(self.cache.setdefault('A', 9), 0)
+        self.assertEqual(self.cache.setdefault('F', 9), 9)
+
+        self.cache.update(G=7, H=8)
+        self.assertEqual(len(self.cache), 3)
+        self.assertFalse('A' in self.cache)
+
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.keys(), [])
+        self.assertRaises(KeyError, self.cache.popitem)
+
+        self.cache['A'] = 0
+        self.assertEqual(self.cache.items(), [('A', 0)])
+
+    def test_get_or_load(self):
+        self.assertEqual(self.cache.get_or_load('A', lambda key: 9), 0)
+        self.assertEqual(self.cache.get_or_load('D', lambda key: key.lower()), 'd')
+        self.assertEqual(self.cache['D'], 'd')
+
+    def test_capacity_assignment(self):
+        self.cache.capacity = 2
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual([i for i in self.cache], ['C', 'B'])
+
+
+class TestOOCacheExpiry(TestCase):
+    def setUp(self):
+        self.now = 0
+        self.cache = Cache(3, ttl=10)
+        self.cache.clock = lambda: self.now
+
+        self.cache['A'] = 0
+        self.cache.set('B', 1, ttl=None)
+        self.cache.set('C', 2, ttl=20)
+
+    def test_lazy(self):
+        self.now = 10
+
+        self.assertFalse('A' in self.cache)
+        self.assertEqual(len(self.cache), 3)
+        self.assertRaises(KeyError, lambda: self.cache['A'])
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache['C'], 2)
+
+        self.now = 100
+
+        self.assertEqual(self.cache.get('C'), None)
+        self.assertEqual(self.cache.pop('C', 'expired'), 'expired')
+        self.assertEqual(self.cache['B'], 1)
+        self.assertEqual(self.cache.size, 1)
+
+    def test_refresh(self):
+        self.now = 5
+        self.cache['A'] = 3
+        self.now = 12
+
+        self.assertEqual(self.cache['A'], 3)
+
+    def test_reap(self):
+        self.now = 15
+
+        self.assertEqual(self.cache.reap(), 1)
+        self.assertEqual(self.cache.keys(), ['C', 'B'])
+
+        self.now = 25
+
+        self.assertEqual(self.cache.reap(), 1)
+        self.assertEqual(self.cache.keys(), ['B'])
+
+    def test_reaper(self):
+        cache = ConcurrentCache(4, 2, ttl=0)
+        cache['A'] = 0
+
+        reaper = CacheReaper(cache, 0.01)
+        reaper.start()
+
+        for i in range(100):
+            if not len(cache): break
+            reaper.join(0.01)
+
+        reaper.stop()
+        reaper.join()
+
+        self.assertEqual(len(cache), 0)
+
+
+class TestOOCacheWeight(TestCase):
+    def setUp(self):
+        self.cache = Cache(10, weight=len)
+
+        self.cache['A'] = 'aaaa'
+        self.cache['B'] = 'bbbb'
+
+    def test_weight(self):
+        self.assertEqual(self.cache.size, 8)
+
+        self.cache['C'] = 'cc'
+        self.assertEqual(self.cache.size, 10)
+        self.assertEqual(len(self.cache), 3)
+
+        self.cache['D'] = 'd'
+        self.assertEqual(self.cache.size, 7)
+        self.assertEqual(self.cache.keys(), ['D', 'C', 'B'])
+
+    def test_reweigh(self):
+        self.cache['A'] = 'aaaaaaaa'
+
+        self.assertEqual(self.cache.size, 8)
+        self.assertEqual(self.cache.keys(), ['A'])
+
+        del self.cache['A']
+        self.assertEqual(self.cache.size, 0)
+
+    def test_oversized(self):
+        self.cache['C'] = 'c' * 11
+
+        self.assertEqual(self.cache.size, 8)
+        self.assertEqual(self.cache.keys(), ['B', 'A'])
+
+        self.cache['A'] = 'a' * 11
+
+        self.assertEqual(self.cache.size, 4)
+        self.assertEqual(self.cache.keys(), ['B'])
+
+    def test_oversized_segmented(self):
+        cache = SegmentedCache(10, weight=len)
+        cache['A'] = 'aaaa'
+        cache['A']
+        cache['B'] = 'bbbb'
+        cache['B'] = 'b' * 11
+
+        self.assertEqual(cache.size, 4)
+        self.assertEqual(cache.keys(), ['A'])
+
+
+class TestOOSegmentedCache(TestCase):
+    def setUp(self):
+        self.cache = SegmentedCache(10, protected=0.5)
+
+        for i in range(5):
+            self.cache[i] = i
+            self.cache[i]
+
+    def test_scan(self):
+        for i in range(100, 200):
+            self.cache[i] = i
+
+        self.assertEqual(len(self.cache), 10)
+        self.assertEqual(self.cache.size, 10)
+        self.assertEqual(self.cache.keys(), [4, 3, 2, 1, 0, 199, 198, 197, 196, 195])
+
+    def test_demotion(self):
+        for i in range(5, 8):
+            self.cache[i] = i
+            self.cache[i]
+
+        self.assertEqual(self.cache.keys(), [7, 6, 5, 4, 3, 2, 1, 0])
+        self.assertEqual(self.cache._protected_size, 5)
+
+        self.cache.capacity = 4
+        self.assertEqual(self.cache.keys(), [7, 6, 5, 4])
+
+    def test_dict_methods(self):
+        self.cache['A'] = 'a'
+        self.cache['B'] = 'b'
+
+        self.assertEqual(self.cache.popitem(), ('A', 'a'))
+        self.assertEqual(self.cache.pop(4), 4)
+        self.assertEqual(self.cache._protected_size, 4)
+
+        del self.cache['B']
+        self.assertEqual(self.cache.popitem(), (0, 0))
+        self.assertEqual(self.cache._protected_size, 3)
+
+        self.cache.clear()
+        self.assertEqual(self.cache.keys(), [])
+        self.assertEqual(self.cache._protected_size, 0)
+        self.assertRaises(KeyError, self.cache.popitem)
+
+    def test_admission(self):
+        cache = SegmentedCache(2, admission=True)
+        cache['A'] = 0
+        cache['B'] = 1
+
+        for i in range(3):
+            cache['A']
+            cache['B']
+
+        cache['C'] = 2
+        self.assertFalse('C' in cache)
+
+        for i in range(5):
+            cache.get('C')
+
+        cache['C'] = 2
+        self.assertTrue('C' in cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_sketch(self):
+        sketch = FrequencySketch(4)
+
+        for i in range(20):
+            sketch.increment('A')
+
+        sketch.increment('B')
+
+        self.assertEqual(sketch.estimate('A'), 15)
+        self.assertTrue(sketch.estimate('B') >= 1)
+        self.assertTrue(sketch.estimate('C') <= sketch.estimate('B'))
+
+        for i in range(19):
+            sketch.increment('B')
+
+        self.assertEqual(sketch.estimate('A'), 7)
+
+    def test_sketch_size(self):
+        cache = SegmentedCache(64 * 2 ** 20, weight=len, admission=True, entries=1000)
+        self.assertEqual(len(cache.sketch._rows[0]), 2048)
+        self.assertEqual(cache.sketch._sample, 10000)
+
+        sketch = FrequencySketch(2 ** 40)
+        self.assertEqual(len(sketch._rows[0]), 4 * FrequencySketch.LIMIT)
+
+
+class TestOOConcurrentCache(TestCase):
+    def setUp(self):
+        self.cache = ConcurrentCache(12, 4)
+
+    def test_basic(self):
+        self.cache.update(A=0, B=1, C=2)
+
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(self.cache['A'], 0)
+        self.assertTrue('B' in self.cache)
+        self.assertEqual(sorted(self.cache), ['A', 'B', 'C'])
+        self.assertEqual(sorted(self.cache.values()), [0, 1, 2])
+
+        del self.cache['B']
+        self.assertFalse('B' in self.cache)
+        self.assertEqual(self.cache.get('B', 'default'), 'default')
+        self.assertEqual(self.cache.pop('C'), 2)
+        self.assertEqual(self.cache.setdefault('D', 3), 3)
+        self.assertEqual(sorted(self.cache.items()), [('A', 0), ('D', 3)])
+
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_capacity(self):
+        for i in range(100):
+            self.cache[i] = i
+
+        self.assertEqual(len(self.cache), 12)
+
+        self.cache.capacity = 4
+        self.assertTrue(len(self.cache) <= 4)
+
+        def shrink():
+            self.cache.capacity = 3
+
+        self.assertRaises(ValueError, shrink)
+
+    def test_small_capacity(self):
+        cache = ConcurrentCache(10, 16)
+        self.assertEqual([shard.capacity for lock, shard in cache._shards], [1] * 10)
+
+        for i in range(100):
+            cache[i] = i
+
+        self.assertEqual(len(cache), 10)
+
+        for i in range(16):
+            cache[i] = 'x'
+            self.assertTrue(i in cache)
+
+        loads = []
+        loader = lambda key: loads.append(key) or key
+
+        cache.get_or_load(15, loader)
+        cache.get_or_load(15, loader)
+        self.assertEqual(loads, [])
+
+        self.assertEqual(len(ConcurrentCache(0, 16)._shards), 1)
+
+    def test_threads(self):
+        cache = ConcurrentCache(64, 4)
+        failures = []
+
+        def worker(offset):
+            try:
+                for i in range(2000):
+                    key = (i * 7 + offset) % 100
+                    cache[key] = key
+                    self.assertEqual(cache.get(key, key), key)
+
+            except Exception as e: # pragma: no cover
+                failures.append(e)
+
+        threads = [threading.Thread(target=worker, args=(i, )) for i in range(8)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+
+        self.assertEqual(failures, [])
+        self.assertTrue(len(cache) <= 64)
+
+        for lock, shard in cache._shards:
+            self.assertEqual(len(shard.keys()), len(shard))
+
+    def test_get_or_load(self):
+        calls = []
+        ready = threading.Event()
+        results = []
+
+        def loader(key):
+            calls.append(key)
+            ready.wait(1)
+            return key * 2
+
+        def worker():
+            results.append(self.cache.get_or_load(21, loader))
+
+        threads = [threading.Thread(target=worker) for i in range(8)]
+        for thread in threads: thread.start()
+
+        while not calls: ready.wait(0.001)
+        ready.set()
+
+        for thread in threads: thread.join()
+
+        self.assertEqual(calls, [21])
+        self.assertEqual(results, [42] * 8)
+        self.assertEqual(self.cache.get_or_load(21, loader), 42)
+        self.assertEqual(self.cache._pending, [{}, {}, {}, {}])
+
+    def test_get_or_load_failure(self):
+        def loader(key):
+            raise LookupError(key)
+
+        self.assertRaises(LookupError, lambda: self.cache.get_or_load('A', loader))
+        self.assertFalse('A' in self.cache)
+        self.assertEqual(self.cache.get_or_load('A', lambda key: 1), 1)
+
+    def test_get_or_load_async(self):
+        import asyncio
+
+        calls = []
+
+        def loader(key):
+            calls.append(key)
+            return asyncio.sleep(0.01, key * 2)
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        try:
+            waiting = [self.cache.get_or_load_async(21, loader) for i in range(4)]
+            self.assertEqual(loop.run_until_complete(asyncio.gather(*waiting)), [42] * 4)
+            self.assertEqual(loop.run_until_complete(self.cache.get_or_load_async(21, loader)), 42)
+
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+        self.assertEqual(calls, [21])
+        self.assertEqual(self.cache[21], 42)
+
+
+class TestOOCached(TestCase):
+    def test_function(self):
+        calls = []
+
+        @cached(2)
+        def square(value, offset=0):
+            calls.append(value)
+            return value * value + offset
+
+        self.assertEqual(square.__name__, 'square')
+        self.assertEqual(square(2), 4)
+        self.assertEqual(square(2), 4)
+        self.assertEqual(square(3), 9)
+        self.assertEqual(square(3, offset=1), 10)
+        self.assertEqual(square(3, offset=1), 10)
+        self.assertEqual(calls, [2, 3, 3])
+
+        self.assertEqual(square.stats(), dict(hits=2, misses=3, evictions=1, size=2, capacity=2))
+
+        square.clear()
+        self.assertEqual(square.stats(), dict(hits=0, misses=0, evictions=0, size=0, capacity=2))
+
+    def test_key(self):
+        @cached(key=lambda value, ignored=None: value)
+        def identity(value, ignored=None):
+            return ignored
+
+        self.assertEqual(identity(1, 'first'), 'first')
+        self.assertEqual(identity(1, 'second'), 'first')
+
+    def test_tuple_argument(self):
+        @cached()
+        def pack(*args):
+            return args
+
+        self.assertEqual(pack((1, 2)), ((1, 2), ))
+        self.assertEqual(pack(1, 2), (1, 2))
+
+    def test_method(self):
+        class Example(object):
+            def __init__(self, base):
+                self.base = base
+
+            @cached(4)
+            def add(self, value):
+                return self.base + value
+
+        a, b = Example(1), Example(10)
+
+        self.assertEqual(a.add(1), 2)
+        self.assertEqual(a.add(1), 2)
+        self.assertEqual(b.add(1), 11)
+        self.assertEqual(a.add.stats()['hits'], 1)
+        self.assertEqual(b.add.stats()['hits'], 0)
+        self.assertEqual(Example.add.stats()['misses'], 0)
+
+        reference = weakref.ref(a)
+        del a
+
+        self.assertTrue(reference() is None)  # Freed without waiting for the cycle collector.
+
+    def test_threads(self):
+        @cached(16)
+        def square(value):
+            return value * value
+
+        errors, wrong = [], []
+
+        def worker(offset):
+            try:
+                for i in range(5000):
+                    value = (i * 7 + offset) % 40
+
+                    if square(value) != value * value:
+                        wrong.append(value)
+
+            except Exception as e:
+                errors.append(e)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+        try:
+            workers = [threading.Thread(target=worker, args=(i, )) for i in range(8)]
+
+            for thread in workers:
+                thread.start()
+
+            for thread in workers:
+                thread.join()
+
+        finally:
+            sys.setswitchinterval(interval)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(wrong, [])
+
+        stats = square.stats()
+        self.assertEqual(stats['hits'] + stats['misses'], 8 * 5000)
+        self.assertEqual(stats['size'], 16)
+
+    def test_slots_method(self):
+        class Example(object):
+            __slots__ = ('base', '__weakref__')
+
+            def __init__(self, base):
+                self.base = base
+
+            @cached(4)
+            def add(self, value):
+                return self.base + value
+
+        a, b = Example(1), Example(10)
+
+        self.assertEqual(a.add(1), 2)
+        self.assertEqual(a.add(1), 2)
+        self.assertEqual(b.add(1), 11)
+        self.assertTrue(a.add is a.add)
+        self.assertEqual(a.add.stats()['hits'], 1)
+        self.assertEqual(b.add.stats()['hits'], 0)
+
+        reference = weakref.ref(a)
+        del a
+
+        self.assertTrue(reference() is None)
+        self.assertEqual(len(Example.add._instances), 1)
+
+        class Strict(object):
+            __slots__ = ('base', )
+
+            @cached(4)
+            def add(self, value):
+                return value
+
+        self.assertRaises(TypeError, lambda: Strict().add)
+
+
+class TestOOGetArgSpec(TestCase):
+    def test_function(self):
+        def fn(a, b=2, *args, **kw):
+            pass
+
+        self.assertEqual(getargspec(fn), (['a', 'b'], dict(b=2), True, True))
+        self.assertEqual(getargspec(lambda: None), ([], dict(), False, False))
+
+    def test_methods(self):
+        class Handler(object):
+            def __init__(self, a, b=1):
+                pass
+
+            def handle(self, c, d=None):
+                pass
+
+            @classmethod
+            def factory(cls, e):
+                pass
+
+            def __call__(self, f, *args):
+                pass
+
+        self.assertEqual(getargspec(Handler), (['a', 'b'], dict(b=1), False, False))
+        self.assertEqual(getargspec(Handler.handle), (['c', 'd'], dict(d=None), False, False))
+        self.assertEqual(getargspec(Handler.factory), (['e'], dict(), False, False))
+
+        instance = Handler(1)
+        self.assertEqual(getargspec(instance.handle), (['c', 'd'], dict(d=None), False, False))
+        self.assertEqual(getargspec(instance), (['f'], dict(), True, False))
+        self.assertEqual(getargspec(object), ([], dict(), False, False))
+
+    def test_partial(self):
+        def fn(a, b, c=3):
+            pass
+
+        self.assertEqual(getargspec(functools.partial(fn, 1)), (['b', 'c'], dict(c=3), False, False))
+
+    def test_keyword_only(self):
+        namespace = dict()
+        exec("def fn(a, *, b, c=1): pass", namespace)
+
+        self.assertEqual(getargspec(namespace['fn']), (['a', 'b', 'c'], dict(c=1), False, False))
+
+    def test_not_callable(self):
+        self.assertRaises(TypeError, getargspec, 27)
+
+    def test_cache(self):
+        def fn(a, b=2):
+            pass
+
+        required, optional, args, kwargs = getargspec(fn)
+        required.append('mutated')
+        optional.clear()
+
+        self.assertEqual(getargspec(fn), (['a', 'b'], dict(b=2), False, False))
+
+        ref = weakref.ref(fn)
+        del fn
+        gc.collect()
+
+        self.assertIsNone(ref())
+
+    def test_method_naming(self):
+        class Handler(object):
+            def handle(this, a):
+                pass
+
+        self.assertEqual(getargspec(Handler.handle), (['this', 'a'], dict(), False, False))
+        self.assertEqual(getargspec(Handler().handle), (['a'], dict(), False, False))
+
+
+class TestOOBinder(TestCase):
+    def test_bind(self):
+        def fn(a, b=2):
+            return a, b
+
+        bind = compile_binder(fn)
+
+        self.assertIs(compile_binder(fn), bind)
+        self.assertEqual(bind(1), ((), dict(a=1, b=2)))
+        self.assertEqual(bind(b=3, a=1), ((), dict(a=1, b=3)))
+        self.assertEqual(bind('x', '4'), ((), dict(a='x', b='4')))
+
+        args, kw = bind(1)
+        self.assertEqual(fn(*args, **kw), (1, 2))
+
+    def test_errors(self):
+        bind = compile_binder(lambda a, b=2: None)
+
+        self.assertRaises(TypeError, bind)
+        self.assertRaises(TypeError, bind, b=1)
+        self.assertRaises(TypeError, bind, 1, 2, 3)
+        self.assertRaises(TypeError, bind, 1, a=1)
+        self.assertRaises(TypeError, bind, 1, c=3)
+
+    def test_variable(self):
+        def fn(a, *args, **kw):
+            return a, args, kw
+
+        bind = compile_binder(fn)
+
+        self.assertEqual(bind(1, c=3), ((), dict(a=1, c=3)))
+        self.assertEqual(bind(1, 2, 3, c=4), ((1, 2, 3), dict(c=4)))
+
+        args, kw = bind(1, 2, c=4)
+        self.assertEqual(fn(*args, **kw), (1, (2, ), dict(c=4)))
+
+    def test_methods(self):
+        class Controller(object):
+            def index(self, page=1):
+                return page
+
+        controller = Controller()
+        args, kw = compile_binder(controller.index)(page=2)
+
+        self.assertEqual(controller.index(*args, **kw), 2)
+        self.assertEqual(compile_binder(Controller.index)(controller), ((), dict(self=controller, page=1)))
+
+
+    @skipIf(sys.version_info < (3, 0), "Keyword-only arguments require Python 3.")
+    def test_keyword_only(self):
+        namespace = dict()
+        exec("def fn(a, *, b=1): return a, b\ndef rest(a, *rest, b=1): return a, rest, b", namespace)
+
+        bind = compile_binder(namespace['fn'])
+        self.assertRaises(TypeError, bind, 1, 2)
+        self.assertEqual(bind(1, b=2), ((), dict(a=1, b=2)))
+
+        bind = compile_binder(namespace['rest'])
+        args, kw = bind(1, 2, 3, b=5)
+        self.assertEqual((args, kw), ((1, 2, 3), dict(b=5)))
+        self.assertEqual(namespace['rest'](*args, **kw), (1, (2, 3), 5))
+
+    @skipIf(sys.version_info < (3, 8), "Positional-only arguments require Python 3.8.")
+    def test_positional_only(self):
+        namespace = dict()
+        exec("def fn(a, b=2, /, c=3, **kw): return a, b, c, kw", namespace)
+        fn = namespace['fn']
+        bind = compile_binder(fn)
+
+        self.assertEqual(bind(1, c=4), ((1, 2), dict(c=4)))
+        self.assertEqual(bind(1, 5, 6), ((1, 5), dict(c=6)))
+        self.assertRaises(TypeError, bind, b=1)
+
+        args, kw = bind(1, a=7)
+        self.assertEqual(fn(*args, **kw), (1, 2, 3, dict(a=7)))
+
+        exec("def strict(a, /, b): return a, b", namespace)
+        bind = compile_binder(namespace['strict'])
+
+        self.assertEqual(bind(1, 2), ((1, ), dict(b=2)))
+        self.assertEqual(namespace['strict'](*bind(1, b=2)[0], **bind(1, b=2)[1]), (1, 2))
+        self.assertRaises(TypeError, bind, a=1, b=2)
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super(RecordingHandler, self).__init__()
+        self.records = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.records.append(record.getMessage())
+        self.threads.add(threading.current_thread())
+
+
+class TestOOLoggingFile(TestCase):
+    def setUp(self):
+        self.handler = RecordingHandler()
+        self.log = logging.getLogger('test.logfile')
+        self.log.addHandler(self.handler)
+        self.log.propagate = False
+
+    def tearDown(self):
+        self.log.removeHandler(self.handler)
+
+    def test_unbuffered(self):
+        f = LoggingFile(self.log)
+        f.write("partial")
+        f.writelines(["one\n", "two\n"])
+        f.flush()
+        f.close()
+
+        self.assertEqual(self.handler.records, ["partial", "one\n", "two\n"])
+        self.assertRaises(IOError, f.read)
+
+    def test_lines(self):
+        f = LoggingFile(self.log, buffered=True)
+        f.write("hello ")
+        f.write("world")
+        f.write("\nsecond\nthi")
+        f.writelines(["rd", "\n"])
+        f.write("tail")
+        f.close()
+
+        self.assertEqual(self.handler.records, ["hello world", "second", "third", "tail"])
+        self.assertNotIn(threading.current_thread(), self.handler.threads)
+
+        f.write("after")
+        self.assertEqual(self.handler.records[-1], "after")
+
+    def test_thresholds(self):
+        f = LoggingFile(self.log, buffered=True, size=5, interval=3600)
+        f.write("abc")
+        f.write("defg")
+        f.write("h")
+        f.flush()
+        f.close()
+
+        self.assertEqual(self.handler.records, ["abcdefg", "h"])
+
+        del self.handler.records[:]
+        f = LoggingFile(self.log, buffered=True, interval=0)
+        f.write("a")
+        f.write("b")
+        f.close()
+
+        self.assertEqual(self.handler.records, ["a", "b"])
+
+    def test_idle_interval(self):
+        f = LoggingFile(self.log, buffered=True, interval=0.05)
+
+        try:
+            f.write("progress")
+
+            for i in range(100):
+                if self.handler.records:
+                    break
+
+                time.sleep(0.01)
+
+            self.assertEqual(self.handler.records, ["progress"])
+
+        finally:
+            f.close()
+
+        self.assertEqual(self.handler.records, ["progress"])
+
+    def test_level(self):
+        f = LoggingFile(self.log, logging.DEBUG, buffered=True)
+        self.log.setLevel(logging.INFO)
+
+        try:
+            f.write("ignored\n")
+            f.close()
+
+        finally:
+            self.log.setLevel(logging.NOTSET)
+
+        self.assertEqual(self.handler.records, [])
+
+    def test_bytes(self):
+        f = LoggingFile(self.log)
+        f.write(b"caf\xc3\xa9")
+        f.writelines([b"one\n"])
+
+        f = LoggingFile(self.log, buffered=True)
+        f.write(b"caf\xc3\xa9\nhal")
+        f.writelines([b"f\n"])
+        f.close()
+
+        self.assertEqual(self.handler.records, ["caf\xe9", "one\n", "caf\xe9", "half"])
+
+
+class TestOOCounterMeta(TestCase):
+    def test_order(self):
+        Counted = CounterMeta('Counted', (object, ), {})
+        first, second = Counted(), Counted()
+
+        self.assertTrue(first._counter < second._counter)
+
+    def test_threads(self):
+        Counted = CounterMeta('Counted', (object, ), {'__slots__': ('_counter', )})
+        threads, per = 8, 125000
+        results = []
+
+        def worker():
+            results.append([Counted()._counter for i in range(per)])
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+        try:
+            workers = [threading.Thread(target=worker) for i in range(threads)]
+
+            for thread in workers:
+                thread.start()
+
+            for thread in workers:
+                thread.join()
+
+        finally:
+            sys.setswitchinterval(interval)
+
+        for counters in results:
+            self.assertEqual(counters, sorted(counters))
+
+        self.assertEqual(len(set(counter for counters in results for counter in counters)), threads * per)
@@ -0,0 +1,165 @@
+# encoding: utf-8
+
+import os
+import shutil
+import tempfile
+import time
+
+from unittest import TestCase
+
+from marrow.util.object import Cache
+from marrow.util.persist import DiskStore, TieredCache
+
+
+
+class TestDiskStore(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.db')
+        self.store = DiskStore(self.path, batch=2)
+
+        self.store['A'] = 0
+        self.store[('B', 1)] = [1]
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def test_basic(self):
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(self.store['A'], 0)
+        self.assertEqual(self.store[('B', 1)], [1])
+        self.assertTrue('A' in self.store)
+        self.assertFalse('C' in self.store)
+        self.assertRaises(KeyError, lambda: self.store['C'])
+        self.assertEqual(self.store.get('C', 'default'), 'default')
+
+        self.assertEqual(self.store.pop('A'), 0)
+        self.assertEqual(self.store.pop('A', None), None)
+        self.assertRaises(KeyError, lambda: self.store.pop('A'))
+
+        del self.store[('B', 1)]
+        self.assertRaises(KeyError, lambda: self.store.__delitem__(('B', 1)))
+        self.assertEqual(len(self.store), 0)
+
+    def test_expiry(self):
+        now = [0]
+        self.store.clock = lambda: now[0]
+
+        self.store.set('C', 2, 10)
+        self.assertEqual(self.store.items(), [('C', 2, 10), (('B', 1), [1], None), ('A', 0, None)])
+
+        now[0] = 10
+        self.assertFalse('C' in self.store)
+        self.assertRaises(KeyError, lambda: self.store['C'])
+        self.assertEqual(len(self.store), 2)
+
+    def test_persistence(self):
+        self.store['C'] = 2
+        self.store.close()
+
+        self.store = DiskStore(self.path)
+        self.assertEqual(self.store.items(), [('C', 2, None), (('B', 1), [1], None), ('A', 0, None)])
+
+        self.store.clear()
+        self.assertEqual(len(self.store), 0)
+
+    def test_snapshot(self):
+        cache = Cache(3)
+        cache.update(D=3, E=4, F=5)
+        cache['D']
+
+        self.assertEqual(self.store.snapshot(cache), 3)
+        self.store.close()
+
+        self.store = DiskStore(self.path)
+        cache = Cache(3)
+
+        self.assertEqual(self.store.restore(cache), 3)
+        self.assertEqual(cache.keys()[0], 'D')
+        self.assertEqual(sorted(cache.keys()), ['D', 'E', 'F'])
+
+
+class TestTieredCache(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = DiskStore(os.path.join(self.directory, 'cache.db'))
+        self.cache = TieredCache(2, self.store)
+
+        self.cache['A'] = 0
+        self.cache['B'] = 1
+        self.cache['C'] = 2
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def test_spill(self):
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(len(self.store), 1)
+        self.assertTrue('A' in self.cache)
+
+        self.assertEqual(self.cache['A'], 0)
+        self.assertEqual(self.cache.keys(), ['A', 'C'])
+        self.assertEqual(self.store.items(), [('B', 1, None)])
+
+    def test_overwrite_spilled(self):
+        self.cache.set('A', 3, 0.01)
+        self.assertFalse('A' in self.store)
+
+        time.sleep(0.02)
+
+        self.assertFalse('A' in self.cache)
+        self.assertEqual(self.cache.get('A'), None)
+
+    def test_delete(self):
+        del self.cache['A']
+        self.assertFalse('A' in self.cache)
+        self.assertRaises(KeyError, lambda: self.cache.__delitem__('A'))
+
+        self.assertEqual(self.cache.pop('C'), 2)
+        self.assertEqual(self.cache.pop('C', None), None)
+        self.assertRaises(KeyError, lambda: self.cache.pop('C'))
+
+        self.cache.clear()
+        self.assertEqual(len(self.store), 0)
+
+    def test_warm_restart(self):
+        self.assertEqual(self.cache.snapshot(), 2)
+
+        cache = TieredCache(2, self.store)
+        self.assertEqual(cache.restore(), 2)
+        self.assertEqual(cache.keys(), ['C', 'B'])
+        self.assertEqual(cache['A'], 0)
+
+    def test_restore_keeps_snapshot(self):
+        path = os.path.join(self.directory, 'warm.db')
+        store = DiskStore(path)
+        cache = TieredCache(5, store)
+
+        for i in range(5):
+            cache[i] = i
+
+        self.assertEqual(cache.snapshot(), 5)
+        store.close()
+
+        store = DiskStore(path)
+        cache = TieredCache(5, store)
+        self.assertEqual(cache.restore(), 5)
+        self.assertEqual(len(store), 5)
+        self.assertEqual(sorted(cache.keys()), [0, 1, 2, 3, 4])
+        store.close()
+
+        store = DiskStore(path)  # As if restarted after a crash.
+        self.assertEqual(len(store), 5)
+
+        cache = TieredCache(5, store)
+        cache.restore()
+        cache[0] = 'changed'
+        self.assertFalse(0 in store)
+        store.close()
+
+    def test_untracked_keys(self):
+        self.assertEqual(self.cache._spilled, set(['A']))
+        self.assertRaises(KeyError, lambda: self.cache['missing'])
+        self.assertFalse('missing' in self.cache)
@@ -0,0 +1,144 @@
+# encoding: utf-8
+
+import multiprocessing
+import os
+import subprocess
+import sys
+
+from unittest import TestCase, skipIf
+
+from marrow.util.shared import SharedCache, shared_memory
+
+
+
+class TestSharedCache(TestCase):
+    def setUp(self):
+        self.cache = SharedCache(8, 128, 4)
+
+        self.cache['A'] = 0
+        self.cache['B'] = [1, 2]
+        self.cache[('C', 3)] = {'c': 3}
+
+    def tearDown(self):
+        self.cache.close()
+
+    def test_basic(self):
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(self.cache['A'], 0)
+        self.assertEqual(self.cache['B'], [1, 2])
+        self.assertEqual(self.cache[('C', 3)], {'c': 3})
+        self.assertTrue('A' in self.cache)
+        self.assertFalse('D' in self.cache)
+        self.assertRaises(KeyError, lambda: self.cache['D'])
+        self.assertEqual(sorted(self.cache.keys(), key=repr), ['A', 'B', ('C', 3)])
+
+    def test_modification(self):
+        self.cache['A'] = 'replaced'
+        self.assertEqual(self.cache['A'], 'replaced')
+        self.assertEqual(len(self.cache), 3)
+
+        del self.cache['A']
+        self.assertFalse('A' in self.cache)
+        self.assertRaises(KeyError, lambda: self.cache.__delitem__('A'))
+
+        self.assertEqual(self.cache.pop('B'), [1, 2])
+        self.assertEqual(self.cache.pop('B', None), None)
+        self.assertEqual(self.cache.setdefault('D', 4), 4)
+        self.assertEqual(self.cache.get_or_load('E', lambda key: key * 2), 'EE')
+        self.assertEqual(len(self.cache), 3)
+
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.items(), [])
+
+    def test_oversized(self):
+        self.cache['A'] = 'x' * 200
+
+        self.assertFalse('A' in self.cache)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_eviction(self):
+        for i in range(100):
+            self.cache[i] = i
+            self.cache['A']
+
+        self.assertEqual(len(self.cache), 8)
+        self.assertEqual(self.cache['A'], 0)
+
+    def test_expiry(self):
+        now = [0]
+        self.cache.clock = lambda: now[0]
+
+        self.cache.set('A', 0, 10)
+        self.cache.set('B', 1)
+        now[0] = 10
+
+        self.assertFalse('A' in self.cache)
+        self.assertEqual(sorted(self.cache.keys(), key=repr), ['B', ('C', 3)])
+        self.assertRaises(KeyError, lambda: self.cache['A'])
+
+    @skipIf(not hasattr(os, 'fork'), "Requires fork.")
+    def test_fork(self):
+        context = multiprocessing.get_context('fork')
+        process = context.Process(target=self.cache.__setitem__, args=('shared', os.getpid()))
+        process.start()
+        process.join()
+
+        self.assertEqual(self.cache['shared'], os.getpid())
+
+    @skipIf(shared_memory is None, "Requires multiprocessing.shared_memory.")
+    def test_named(self):
+        cache = SharedCache(8, 128, 4, name='marrow-util-test-%d' % os.getpid())
+
+        try:
+            cache['A'] = 0
+
+            other = SharedCache(8, 128, 4, name=cache.name, create=False, lock=cache.lock)
+            self.assertEqual(other['A'], 0)
+            other.close()
+
+            self.assertRaises(ValueError, lambda: SharedCache(8, 64, 4, name=cache.name, create=False))
+
+        finally:
+            cache.close()
+            cache.unlink()
+
+    @skipIf(shared_memory is None, "Requires multiprocessing.shared_memory.")
+    def test_named_processes(self):
+        cache = SharedCache(8, 128, 4, name='marrow-util-test-%d' % os.getpid())
+        script = "from marrow.util.shared import SharedCache; " \
+                "print(SharedCache(8, 128, 4, name={0!r}, create=False)['A'])".format(cache.name)
+        environment = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+
+        try:
+            cache['A'] = 27
+
+            for i in range(2):  # The first process exiting must not destroy the block.
+                self.assertEqual(subprocess.check_output([sys.executable, '-c', script], env=environment).strip(), b'27')
+
+            self.assertEqual(cache['A'], 27)
+
+        finally:
+            cache.close()
+            cache.unlink()
+
+    def test_named_writers(self):
+        cache = SharedCache(16384, 128, 8, name='marrow-util-writers-%d' % os.getpid())
+        script = "from marrow.util.shared import SharedCache\n" \
+                "cache = SharedCache(16384, 128, 8, name={0!r}, create=False)\n" \
+                "for i in range(5000): cache[(%d, i)] = i\n".format(cache.name)
+        environment = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+
+        try:
+            processes = [subprocess.Popen([sys.executable, '-c', script % j], env=environment) for j in range(2)]
+            self.assertEqual([process.wait() for process in processes], [0, 0])
+
+            self.assertEqual(len(cache), 10000)  # Unlocked concurrent writers lose count updates.
+
+            for j in range(2):
+                for i in range(5000):
+                    self.assertEqual(cache[(j, i)], i)
+
+        finally:
+            cache.close()
+            cache.unlink()